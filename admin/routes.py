@@ -1,24 +1,26 @@
 import os
-import uuid
 from flask import (Blueprint, render_template, redirect, url_for, flash,
                    request, jsonify, current_app)
 from flask_login import login_required
-from werkzeug.utils import secure_filename
 from extensions import db, csrf
-from models import Post
+from models import Post, commit_unique_slug
 from forms import PostForm
+from services.images import image_pipeline
+from services.storage import store_upload, upload_path
 
 admin_bp = Blueprint('admin', __name__, template_folder='templates')
 
+def save_upload(file_storage):
+    """Grava o arquivo pelo hash do conteúdo e retorna o caminho relativo a 'static'."""
+    relative_path, created = store_upload(file_storage)
+    if created:
+        # Variações redimensionadas/WebP são geradas em segundo plano
+        image_pipeline.submit(upload_path(relative_path), relative_path)
+    return relative_path
+
 def save_picture(form_picture):
     """Função para salvar a imagem de destaque e retornar o nome do arquivo."""
-    random_hex = uuid.uuid4().hex
-    _, f_ext = os.path.splitext(form_picture.filename)
-    picture_fn = random_hex + f_ext
-    picture_path = os.path.join(current_app.config['UPLOAD_FOLDER'], picture_fn)
-    form_picture.save(picture_path)
-    # Retorna o caminho relativo a partir da pasta 'static'
-    return os.path.join('uploads', picture_fn)
+    return save_upload(form_picture)
 
 @admin_bp.route('/')
 @login_required
@@ -44,8 +46,7 @@ def novo_post():
             caminho_imagem = save_picture(form.imagem.data)
             novo_post.imagem = caminho_imagem
 
-        db.session.add(novo_post)
-        db.session.commit()
+        commit_unique_slug(novo_post)
         flash('Post criado com sucesso!', 'success')
         return redirect(url_for('admin.dashboard'))
     return render_template('editor.html', form=form, legend="Novo Post", title="Novo Post")
@@ -65,7 +66,7 @@ def editar_post(id):
             caminho_imagem = save_picture(form.imagem.data)
             post.imagem = caminho_imagem
             
-        db.session.commit()
+        commit_unique_slug(post)
         flash('Post atualizado com sucesso!', 'success')
         return redirect(url_for('admin.dashboard'))
     
@@ -93,19 +94,16 @@ def upload():
         return jsonify({'error': {'message': 'Requisição inválida. Nenhum arquivo no campo "upload".'}}), 400
 
     try:
-        random_hex = uuid.uuid4().hex
         _, f_ext = os.path.splitext(f.filename)
         # Limita as extensões permitidas para maior segurança
         allowed_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
         if f_ext.lower() not in allowed_extensions:
             return jsonify({'error': {'message': 'Tipo de arquivo não permitido.'}}), 400
 
-        filename = secure_filename(random_hex + f_ext)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        
-        f.save(filepath)
+        # Arquivos idênticos já enviados são reaproveitados (nome = hash do conteúdo)
+        relative_path = save_upload(f)
         
-        url = url_for('static', filename=f'uploads/{filename}', _external=True)
+        url = url_for('static', filename=relative_path, _external=True)
         
         # CKEditor 5 espera uma resposta JSON com a chave 'url'
         return jsonify({'url': url})
@@ -10,11 +10,39 @@ class Config:
     """Configurações base da aplicação."""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'uma-chave-secreta-forte-e-dificil-de-adivinhar'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Banco de dados (services/database.py): PRAGMAs do SQLite aplicados em cada conexão
+    # e pool de conexões do PostgreSQL/MySQL. SQLALCHEMY_ENGINE_OPTIONS sobrescreve os padrões.
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # ~20 MB (valores negativos são em KB)
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON',
+    }
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))
+    # Réplica somente leitura para as páginas públicas (opcional) e intervalo (s)
+    # para tentar usá-la de novo depois de uma falha
+    DATABASE_READ_URL = os.environ.get('DATABASE_READ_URL')
+    REPLICA_RETRY_INTERVAL = int(os.environ.get('REPLICA_RETRY_INTERVAL', 30))
     
     # Configuração de Uploads
-    UPLOAD_FOLDER = os.path.join(base_dir, 'static')
+    UPLOAD_FOLDER = os.path.join(base_dir, 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16 MB
 
+    # Variações geradas para cada imagem enviada (larguras em px) e pool de processamento
+    IMAGE_WIDTHS = (320, 640, 960, 1280)
+    IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 82))
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+    # Arquivos estáticos com hash no nome ('flask assets-build' gera static/dist/manifest.json)
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', 'true').lower() in ['true', 'on', '1']
+
     # Configuração de Email
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -23,6 +51,83 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_USERNAME')
 
+    # Fila de e-mails: 'thread' entrega em segundo plano em cada processo;
+    # 'external' deixa a entrega para o comando 'flask outbox-worker'
+    MAIL_OUTBOX_WORKER = os.environ.get('MAIL_OUTBOX_WORKER', 'thread')
+    MAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', 20))
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 5))
+    MAIL_OUTBOX_RETRY_BASE = int(os.environ.get('MAIL_OUTBOX_RETRY_BASE', 60))  # segundos, dobra a cada tentativa
+    MAIL_OUTBOX_POLL_INTERVAL = int(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL', 30))
+
+    # Configuração do Blog
+    POSTS_PER_PAGE = int(os.environ.get('POSTS_PER_PAGE', 10))
+    SEARCH_RESULTS_PER_PAGE = int(os.environ.get('SEARCH_RESULTS_PER_PAGE', 10))
+    # Quantidade de posts relacionados guardados/exibidos por post
+    RELATED_POSTS_COUNT = int(os.environ.get('RELATED_POSTS_COUNT', 5))
+
+    # Contador de visualizações: grava em lote a cada N segundos ou N pendências
+    VIEW_COUNTER_FLUSH_INTERVAL = int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 30))
+    VIEW_COUNTER_FLUSH_SIZE = int(os.environ.get('VIEW_COUNTER_FLUSH_SIZE', 500))
+
+    # Tempo (s) que os dados do sidebar ficam em cache em cada processo
+    SIDEBAR_CACHE_TTL = int(os.environ.get('SIDEBAR_CACHE_TTL', 300))
+
+    # Cache de páginas para visitantes anônimos: 'memory' (LRU por processo),
+    # 'filesystem' (compartilhado entre os workers) ou 'null' (desativado)
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_DIR = os.environ.get('RESPONSE_CACHE_DIR')  # padrão: instance/response_cache
+    RESPONSE_CACHE_DEFAULT_TTL = int(os.environ.get('RESPONSE_CACHE_DEFAULT_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    # Cabeçalhos da requisição que fazem parte da chave do cache (além da URL)
+    RESPONSE_CACHE_KEY_HEADERS = ()
+    # Parâmetros de query string lidos pelas views cacheadas; os demais não entram
+    # na chave (uma view que passar a ler outro parâmetro precisa dele aqui)
+    RESPONSE_CACHE_QUERY_ARGS = ('apos', 'antes', 'q', 'pagina', 'query', 'limit')
+    # Cache de trechos de template ({% cache %}): 'memory', 'filesystem' ou 'null'
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'memory')
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR')  # padrão: instance/fragment_cache
+    FRAGMENT_CACHE_DEFAULT_TTL = int(os.environ.get('FRAGMENT_CACHE_DEFAULT_TTL', 600))
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 2000))
+    FRAGMENT_CACHE_MAX_BYTES = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Tempo (s) que o usuário logado fica em cache em cada processo (user_loader)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))
+    # Intervalo (s) em que cada worker verifica se outro processo alterou o conteúdo
+    CONTENT_VERSION_CHECK_INTERVAL = float(os.environ.get('CONTENT_VERSION_CHECK_INTERVAL', 1.0))
+
+    # Sitemap: URLs por arquivo (limite do protocolo) e partes pré-comprimidas em .xml.gz
+    SITEMAP_MAX_URLS = int(os.environ.get('SITEMAP_MAX_URLS', 50000))
+    SITEMAP_GZIP = os.environ.get('SITEMAP_GZIP', 'true').lower() in ['true', 'on', '1']
+    SITEMAP_CACHE_TTL = int(os.environ.get('SITEMAP_CACHE_TTL', 3600))
+
+    # Exportação estática das páginas públicas ('flask freeze'); com FREEZE_ON_CHANGE,
+    # um freeze incremental roda FREEZE_DELAY segundos depois de cada alteração de conteúdo
+    FREEZE_DIR = os.environ.get('FREEZE_DIR') or os.path.join(base_dir, 'frozen')
+    FREEZE_BASE_URL = os.environ.get('SITE_URL', 'http://localhost')
+    FREEZE_WORKERS = int(os.environ.get('FREEZE_WORKERS', 4))
+    FREEZE_ON_CHANGE = os.environ.get('FREEZE_ON_CHANGE', 'false').lower() in ['true', 'on', '1']
+    FREEZE_DELAY = int(os.environ.get('FREEZE_DELAY', 10))
+
+    # Tabelas de códigos (CID, CBO, SIGTAP) das soluções do tipo 'local_index'
+    CODE_TABLES_FOLDER = os.environ.get('CODE_TABLES_FOLDER') or os.path.join(base_dir, 'data')
+
+    # Instrumentação: fração das requisições medidas em detalhe (consultas, templates,
+    # N+1) e cabeçalho Server-Timing; requisições/consultas lentas sempre vão para o log
+    INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', 'true').lower() in ['true', 'on', '1']
+    INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 0.1))
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'false').lower() in ['true', 'on', '1']
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+
+    # Métricas do Prometheus em /metrics (protegidas por token ou login)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')  # padrão: instance/prometheus
+
+    # Templates compilados em disco, reaproveitados entre workers e reinícios
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get('JINJA_BYTECODE_CACHE_DIR') or os.path.join(base_dir, 'instance', 'jinja_cache')
+
     # Configuração do AdSense
     GOOGLE_ADSENSE_CLIENT = os.environ.get('GOOGLE_ADSENSE_CLIENT', 'ca-pub-XXXXXXXXXXXXXXX')
 
@@ -30,6 +135,12 @@ class DevelopmentConfig(Config):
     """Configurações para desenvolvimento."""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.join(base_dir, 'instance', 'dev.db')}"
+    RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'null')
+    FRAGMENT_CACHE_BACKEND = os.environ.get('FRAGMENT_CACHE_BACKEND', 'null')
+    INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('INSTRUMENTATION_SAMPLE_RATE', 1.0))
+    SERVER_TIMING = os.environ.get('SERVER_TIMING', 'true').lower() in ['true', 'on', '1']
+    # Em desenvolvimento os arquivos editados devem aparecer sem rodar assets-build
+    ASSETS_USE_MANIFEST = os.environ.get('ASSETS_USE_MANIFEST', 'false').lower() in ['true', 'on', '1']
 
 class ProductionConfig(Config):
     """Configurações para produção."""
@@ -42,8 +153,13 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Configurações para testes."""
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite:///:memory:')
+    # Sem thread de entrega: os testes chamam outbox.process_batch() diretamente
+    MAIL_OUTBOX_WORKER = 'external'
     WTF_CSRF_ENABLED = False
+    RESPONSE_CACHE_BACKEND = 'null'
+    FRAGMENT_CACHE_BACKEND = 'null'
+    JINJA_BYTECODE_CACHE_DIR = None
 
 config_by_name = dict(
     development=DevelopmentConfig,
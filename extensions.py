@@ -3,8 +3,10 @@ from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect # <-- Adicionar esta importação
+from services.db_routing import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession envia leituras públicas para a réplica, se DATABASE_READ_URL estiver definida
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 mail = Mail()
 login_manager = LoginManager()
@@ -0,0 +1,56 @@
+"""
+Configuração do gunicorn:
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Com preload_app a aplicação é criada uma única vez no processo mestre (imports,
+blueprints, templates pré-compilados) e os workers a herdam no fork, dividindo
+essa memória por copy-on-write em vez de cada um montar a sua.
+"""
+import gc
+import os
+import sys
+import time
+
+os.environ.setdefault('FLASK_ENV', 'production')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ['true', 'on', '1']
+# Heartbeat dos workers em memória, não no disco
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+def on_starting(server):
+    from services.metrics import on_starting as clear_metrics
+    clear_metrics()
+
+def when_ready(server):
+    app_module = sys.modules.get('wsgi')
+    if app_module is not None:
+        from services.startup import format_report
+        server.log.info(format_report(app_module.application.extensions['startup']))
+        # Objetos criados no preload saem do GC: a coleta nos workers não toca nessas
+        # páginas, que continuam compartilhadas com o mestre
+        gc.freeze()
+
+def post_fork(server, worker):
+    worker.forked_at = time.perf_counter()
+    app_module = sys.modules.get('wsgi')
+    if app_module is not None:
+        # Conexões abertas no mestre não podem ser usadas por dois processos
+        from extensions import db
+        with app_module.application.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+
+def post_worker_init(worker):
+    from services.startup import rss_mb
+    worker.log.info(f"Worker {worker.pid} pronto em "
+                    f"{(time.perf_counter() - worker.forked_at) * 1000:.1f} ms, RSS {rss_mb()} MB")
+
+def child_exit(server, worker):
+    from services.metrics import child_exit as mark_dead
+    mark_dead(worker)
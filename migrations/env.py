@@ -51,6 +51,19 @@ def get_metadata():
     return target_db.metadata
 
 
+# Tabelas do índice de busca textual (services/search.py): criadas por SQL próprio,
+# fora dos modelos, e que o autogenerate não deve propor remover
+SEARCH_TABLE_PREFIXES = ('posts_fts', 'posts_search')
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = object if type_ == 'table' else getattr(object, 'table', None)
+    table_name = name if type_ == 'table' else getattr(table, 'name', None)
+    if table_name and table_name.startswith(SEARCH_TABLE_PREFIXES):
+        return False
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +78,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +107,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
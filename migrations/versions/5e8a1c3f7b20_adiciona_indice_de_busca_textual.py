@@ -0,0 +1,44 @@
+"""Adiciona índice de busca textual dos posts
+
+Revision ID: 5e8a1c3f7b20
+Revises: 3b9d0f6e2a71
+Create Date: 2026-10-18 11:26:52.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8a1c3f7b20'
+down_revision = '3b9d0f6e2a71'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Estrutura específica de cada banco (FTS5 no SQLite, tsvector + GIN no PostgreSQL).
+    # Depois de aplicar, rode 'flask search-reindex' para indexar os posts existentes.
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE posts_fts USING fts5("
+                   "titulo, resumo, conteudo, tokenize='unicode61 remove_diacritics 2')")
+    elif dialect == 'postgresql':
+        op.create_table('posts_search',
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('documento', sa.dialects.postgresql.TSVECTOR(), nullable=False),
+        sa.Column('texto', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('post_id')
+        )
+        op.create_index('ix_posts_search_documento', 'posts_search', ['documento'],
+                        unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE posts_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_posts_search_documento', table_name='posts_search')
+        op.drop_table('posts_search')
@@ -4,7 +4,15 @@ from flask_login import UserMixin
 from extensions import db, login_manager
 import re
 import unicodedata
+from sqlalchemy import select, or_, inspect
 from sqlalchemy.event import listen
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+from services.cache import content_changed
+from services import search
+from services.post_fields import apply_derived_fields
+from services.images import manifest_lqip
+from services.user_cache import user_cache, CachedUser
 
 def create_slug(text):
     if not text:
@@ -13,6 +21,70 @@ def create_slug(text):
     text = re.sub(r'[^\w\s-]', '', text).strip().lower()
     return re.sub(r'[\s_-]+', '-', text)
 
+class SlugMixin:
+    """
+    Geração de slug único a partir do campo indicado em slug_source.
+
+    Uma única consulta por prefixo traz todos os slugs que colidem (base, base-1,
+    base-2, ...) e o próximo sufixo livre é escolhido em memória. Os slugs já
+    reservados no mesmo flush ficam em session.info, para que importações em lote
+    com títulos repetidos não colidam entre si nem repitam a consulta.
+    """
+    slug_source = None
+
+    def generate_unique_slug(self, connection=None):
+        base_slug = create_slug(getattr(self, self.slug_source))
+        table = self.__table__
+        session = object_session(self)
+        reserved = session.info.setdefault('reserved_slugs', {}) if session is not None else {}
+        key = (table.name, base_slug)
+
+        if key not in reserved:
+            pattern = base_slug.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '-%'
+            stmt = select(table.c.slug).where(or_(table.c.slug == base_slug,
+                                                  table.c.slug.like(pattern, escape='\\')))
+            if self.id is not None:
+                stmt = stmt.where(table.c.id != self.id)
+            execute = connection.execute if connection is not None else db.session.execute
+            reserved[key] = set(execute(stmt).scalars())
+        taken = reserved[key]
+
+        slug = base_slug
+        counter = 1
+        while slug in taken:
+            slug = f"{base_slug}-{counter}"
+            counter += 1
+        taken.add(slug)
+        self.slug = slug
+
+def assign_slug(mapper, connection, target):
+    target.generate_unique_slug(connection)
+
+def refresh_slug(mapper, connection, target):
+    """Na edição, só recalcula o slug se o título mudou."""
+    if inspect(target).attrs[target.slug_source].history.has_changes():
+        target.generate_unique_slug(connection)
+
+def commit_unique_slug(instance, attempts=3):
+    """
+    Salva o objeto tratando a corrida entre inserções concorrentes com o mesmo
+    título: se o índice único de slug for violado, reaplica as alterações e
+    tenta de novo (o slug recém-gravado pelo outro processo passa a ser visto).
+    """
+    for attempt in range(attempts):
+        state = inspect(instance)
+        changes = {attr.key: attr.value for attr in state.attrs if attr.history.has_changes()}
+        db.session.add(instance)
+        try:
+            db.session.commit()
+            return instance
+        except IntegrityError as e:
+            db.session.rollback()
+            if 'slug' not in str(e.orig).lower() or attempt == attempts - 1:
+                raise
+            for key, value in changes.items():
+                setattr(instance, key, value)
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
@@ -25,31 +97,32 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.pw_hash, password)
 
-class Post(db.Model):
+class Post(SlugMixin, db.Model):
     __tablename__ = 'posts'
+    slug_source = 'titulo'
     id = db.Column(db.Integer, primary_key=True)
     titulo = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(200), unique=True, nullable=False, index=True)
     conteudo = db.Column(db.Text, nullable=False)
     resumo = db.Column(db.String(300))
     imagem = db.Column(db.String(200))
+    # Prévia da imagem de destaque (data URI WebP de poucos pixels), exibida até a imagem carregar
+    imagem_lqip = db.Column(db.Text)
     publicado = db.Column(db.Boolean, default=False, nullable=False, index=True)
     data_criacao = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     data_atualizacao = db.Column(db.DateTime, onupdate=datetime.utcnow)
     views = db.Column(db.Integer, default=0)
-
-    def generate_unique_slug(self):
-        base_slug = create_slug(self.titulo)
-        slug = base_slug
-        counter = 1
-        while Post.query.filter(Post.id != self.id).filter_by(slug=slug).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        self.slug = slug
+    # Campos derivados do conteúdo, preenchidos ao salvar (services/post_fields.py)
+    texto_plano = db.Column(db.Text)
+    excerto = db.Column(db.String(300))
+    palavras = db.Column(db.Integer)
+    tempo_leitura = db.Column(db.Integer)
+    conteudo_renderizado = db.Column(db.Text)
 
 # NOVO MODELO DE PRODUTO
-class Product(db.Model):
+class Product(SlugMixin, db.Model):
     __tablename__ = 'products'
+    slug_source = 'name'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     slug = db.Column(db.String(200), unique=True, nullable=False, index=True)
@@ -62,23 +135,106 @@ class Product(db.Model):
     is_featured = db.Column(db.Boolean, default=False, index=True) # Para o destaque na home
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
-    def generate_unique_slug(self):
-        base_slug = create_slug(self.name)
-        slug = base_slug
-        counter = 1
-        while Product.query.filter(Product.id != self.id).filter_by(slug=slug).first():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-        self.slug = slug
+class OutboxMessage(db.Model):
+    """Mensagem de e-mail na fila de envio (entregue pelo worker de services/outbox.py)."""
+    __tablename__ = 'mail_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(255), nullable=False)
+    sender = db.Column(db.String(255))
+    recipients = db.Column(db.String(1000), nullable=False)  # separados por vírgula
+    body = db.Column(db.Text, nullable=False)
+    reply_to = db.Column(db.String(255))
+    # pendente -> enviando -> enviado | falhou
+    status = db.Column(db.String(20), nullable=False, default='pendente', index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class RelatedPost(db.Model):
+    """Vizinhos mais próximos de um post por similaridade TF-IDF (calculados por services/related.py)."""
+    __tablename__ = 'related_posts'
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    position = db.Column(db.Integer, primary_key=True)
+    related_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)
+
+for model in (Post, Product):
+    listen(model, 'before_insert', assign_slug)
+    listen(model, 'before_update', refresh_slug)
+
+# Campos derivados são recalculados quando o conteúdo ou o resumo mudam
+def update_derived_fields(mapper, connection, target):
+    state = inspect(target)
+    if (target.texto_plano is None
+            or any(state.attrs[key].history.has_changes() for key in ('conteudo', 'resumo'))):
+        apply_derived_fields(target)
+
+listen(Post, 'before_insert', update_derived_fields)
+listen(Post, 'before_update', update_derived_fields)
+
+# A prévia LQIP acompanha a imagem de destaque. Só é lida do manifesto (nada de
+# decodificar a imagem durante o flush); se o pipeline ainda não terminou, ele mesmo
+# preenche a prévia ao gravar o manifesto (e o comando images-lqip cobre o resto)
+def update_image_preview(mapper, connection, target):
+    if inspect(target).attrs.imagem.history.has_changes():
+        target.imagem_lqip = manifest_lqip(target.imagem) if target.imagem else None
+
+listen(Post, 'before_insert', update_image_preview)
+listen(Post, 'before_update', update_image_preview)
+
+# Índice de busca textual (services/search.py)
+def reindex_post(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ('titulo', 'resumo', 'conteudo')):
+        search.index_post(connection, target)
+
+listen(Post, 'after_insert', lambda m, c, t: search.index_post(c, t))
+listen(Post, 'after_update', reindex_post)
+listen(Post, 'after_delete', lambda m, c, t: search.unindex_post(c, t))
+
+# Os slugs reservados valem apenas durante um flush
+listen(Session, 'after_flush', lambda s, ctx: s.info.pop('reserved_slugs', None))
+
+# Invalidação de caches: as alterações são marcadas durante o flush e os caches
+# só são notificados depois do commit, para não serem repovoados com dados antigos.
+def mark_content_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['content_changed'] = True
+
+def notify_content_changed(session):
+    if session.info.pop('content_changed', False):
+        content_changed()
+
+for model in (Post, Product):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        listen(model, event_name, mark_content_changed)
+
+listen(Session, 'after_commit', notify_content_changed)
+listen(Session, 'after_rollback', lambda s: s.info.pop('content_changed', None))
+
+# Usuários em cache no user_loader: descartados quando um User é alterado (ex.: senha)
+def mark_users_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['users_changed'] = True
 
-listen(Post, 'before_insert', lambda m, c, t: t.generate_unique_slug())
-listen(Post, 'before_update', lambda m, c, t: t.generate_unique_slug())
+def notify_users_changed(session):
+    if session.info.pop('users_changed', False):
+        user_cache.invalidate()
 
-# Adiciona o listener para o novo modelo Product
-listen(Product, 'before_insert', lambda m, c, t: t.generate_unique_slug())
-listen(Product, 'before_update', lambda m, c, t: t.generate_unique_slug())
+for event_name in ('after_insert', 'after_update', 'after_delete'):
+    listen(User, event_name, mark_users_changed)
+listen(Session, 'after_commit', notify_users_changed)
+listen(Session, 'after_rollback', lambda s: s.info.pop('users_changed', None))
 
+def _query_user(user_id):
+    row = db.session.query(User.id, User.username).filter(User.id == int(user_id)).first()
+    return CachedUser(row.id, row.username) if row else None
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
\ No newline at end of file
+    # Só é chamado quando a sessão tem '_user_id': visitantes anônimos não consultam o banco
+    return user_cache.get(user_id, _query_user)
\ No newline at end of file
@@ -1,36 +1,131 @@
-from flask import Blueprint, render_template, abort
+from datetime import datetime
+from flask import Blueprint, render_template, abort, request, current_app
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import load_only, defer
 from models import Post
-from extensions import db
-from routes.solutions import SOLUTIONS_CONFIG
+from services.view_counter import view_counter
+from services import sidebar
+from services.response_cache import response_cache
+from services.conditional import conditional_response, content_etag, site_last_modified
+from services.search import search_posts
+from services.related import related_posts_for
 
 blog_bp = Blueprint('blog', __name__)
+response_cache.cache_blueprint(blog_bp, ttl=300)
+
+# Colunas necessárias para os cards da listagem (o 'conteudo' nunca é carregado)
+LISTING_COLUMNS = (Post.id, Post.titulo, Post.slug, Post.excerto, Post.imagem, Post.imagem_lqip,
+                   Post.data_criacao)
+
+def encode_cursor(post):
+    """Gera o cursor de paginação a partir de (data_criacao, id) de um post."""
+    return f"{post.data_criacao.isoformat()}_{post.id}"
+
+def decode_cursor(cursor):
+    """Converte o cursor da URL de volta em (data_criacao, id). Retorna None se inválido."""
+    if not cursor:
+        return None
+    try:
+        data, post_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(data), int(post_id)
+    except ValueError:
+        return None
+
+def paginate_posts(per_page, after=None, before=None):
+    """
+    Paginação por cursor (keyset) sobre (data_criacao, id), em ordem decrescente.
+
+    Em vez de OFFSET, filtra a partir do último item visto, o que usa o índice de
+    data_criacao e mantém o custo constante em qualquer página.
+    Retorna (posts, cursor_anterior, cursor_proximo).
+    """
+    query = Post.query.options(load_only(*LISTING_COLUMNS)).filter(Post.publicado == True)
+
+    if before:
+        # Navegação para trás: busca em ordem crescente e inverte o resultado
+        data, post_id = before
+        query = query.filter(or_(Post.data_criacao > data,
+                                 and_(Post.data_criacao == data, Post.id > post_id)))
+        rows = query.order_by(Post.data_criacao.asc(), Post.id.asc()).limit(per_page + 1).all()
+        has_prev = len(rows) > per_page
+        posts = list(reversed(rows[:per_page]))
+        has_next = True
+    else:
+        if after:
+            data, post_id = after
+            query = query.filter(or_(Post.data_criacao < data,
+                                     and_(Post.data_criacao == data, Post.id < post_id)))
+        rows = query.order_by(Post.data_criacao.desc(), Post.id.desc()).limit(per_page + 1).all()
+        has_next = len(rows) > per_page
+        posts = rows[:per_page]
+        has_prev = after is not None
+
+    prev_cursor = encode_cursor(posts[0]) if posts and has_prev else None
+    next_cursor = encode_cursor(posts[-1]) if posts and has_next else None
+    return posts, prev_cursor, next_cursor
 
 @blog_bp.route('/')
 def blog():
-    """Exibe a lista de posts publicados."""
-    posts = Post.query.filter_by(publicado=True).order_by(Post.data_criacao.desc()).all()
-    return render_template('blog.html', posts=posts, title="Blog")
+    """Exibe a lista de posts publicados, paginada por cursor."""
+    after = decode_cursor(request.args.get('apos'))
+    before = decode_cursor(request.args.get('antes')) if not after else None
+    last_modified = site_last_modified()
+
+    def render():
+        posts, prev_cursor, next_cursor = paginate_posts(current_app.config['POSTS_PER_PAGE'], after, before)
+        return render_template('blog.html', posts=posts, title="Blog",
+                               prev_cursor=prev_cursor, next_cursor=next_cursor)
+
+    return conditional_response(render, etag=content_etag('blog', last_modified or ''),
+                                last_modified=last_modified)
+
+@blog_bp.route('/busca')
+def search():
+    """Busca textual nos posts publicados, com ranking e trechos destacados."""
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('pagina', 1, type=int), 1)
+    per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+    results, total = search_posts(query, page, per_page)
+    pages = (total + per_page - 1) // per_page
+    return render_template('search.html', title=f"Busca: {query}" if query else "Busca",
+                           query=query, results=results, total=total, page=page, pages=pages)
 
 @blog_bp.route('/<string:slug>')
 def post_detail(slug):
     """Exibe um post individual e conteúdo para a sidebar."""
-    post = Post.query.filter_by(slug=slug, publicado=True).first_or_404()
-    
-    # Atualiza visualizações
-    post.views = (post.views or 0) + 1
-    db.session.commit()
-    
-    # Busca posts recentes para a sidebar (excluindo o atual)
-    recent_posts = Post.query.filter(Post.id != post.id, Post.publicado==True).order_by(Post.data_criacao.desc()).limit(5).all()
+    # O conteúdo só é carregado se a página precisar ser renderizada (não em um 304)
+    post = (Post.query.options(defer(Post.conteudo), defer(Post.texto_plano), defer(Post.conteudo_renderizado))
+            .filter_by(slug=slug, publicado=True).first_or_404())
     
-    # Pega as soluções ativas para a sidebar
-    active_solutions = {k: v for k, v in SOLUTIONS_CONFIG.items() if v['status'] == 'active'}
+    # Visualizações são acumuladas em memória e gravadas em lote, pelo id: o slug
+    # pode mudar (edição do título) antes da gravação
+    view_counter.record(post.id)
+    response_cache.remember(post_id=post.id)
     
-    return render_template(
-        'post.html', 
-        post=post, 
-        title=post.titulo, 
-        description=post.resumo,
-        recent_posts=recent_posts,
-        solutions=active_solutions
-    )
\ No newline at end of file
+    post_modified = post.data_atualizacao or post.data_criacao
+    # O sidebar lista outros posts, então a página também muda quando eles mudam
+    last_modified = max(d for d in (post_modified, site_last_modified()) if d is not None)
+
+    def render():
+        # Posts recentes (excluindo o atual) e soluções ativas vêm do cache do sidebar
+        recent_posts = [p for p in sidebar.recent_posts() if p.id != post.id][:sidebar.SIDEBAR_POSTS]
+        active_solutions = sidebar.active_solutions()
+
+        return render_template(
+            'post.html',
+            post=post,
+            title=post.titulo,
+            description=post.excerto,
+            recent_posts=recent_posts,
+            related_posts=related_posts_for(post.id),
+            solutions=active_solutions
+        )
+
+    return conditional_response(render, etag=content_etag('post', post.id, post_modified),
+                                last_modified=last_modified)
+
+@response_cache.on_hit('blog.post_detail')
+def count_cached_view(view_args):
+    """Conta a visualização também quando o post é servido pelo cache de páginas."""
+    if 'post_id' in view_args:
+        view_counter.record(view_args['post_id'])
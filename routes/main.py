@@ -1,16 +1,21 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
+from sqlalchemy.orm import load_only
 from forms import ContatoForm
-from extensions import mail
-from flask_mail import Message
-from models import Post
+from services.outbox import outbox
+from models import Post, Product
 from routes.solutions import SOLUTIONS_CONFIG
+from routes.blog import LISTING_COLUMNS
+from services.response_cache import response_cache
+from services.instrumentation import instrumentation
 
 main_bp = Blueprint('main', __name__)
+response_cache.cache_blueprint(main_bp, ttl=600)
 
 @main_bp.route('/')
 def home():
     # Buscando os 3 posts mais recentes para exibir na home
-    latest_posts = Post.query.filter_by(publicado=True).order_by(Post.data_criacao.desc()).limit(3).all()
+    latest_posts = (Post.query.options(load_only(*LISTING_COLUMNS)).filter_by(publicado=True)
+                    .order_by(Post.data_criacao.desc()).limit(3).all())
     # Pega as soluções para exibir na home
     featured_solutions = {k: v for k, v in SOLUTIONS_CONFIG.items() if v['status'] == 'active' and v.get('featured', False)}
     return render_template('home.html', title="Página Inicial", posts=latest_posts, solutions=featured_solutions)
@@ -24,19 +29,22 @@ def produtos():
     return render_template('produtos.html', title="Produtos")
 
 @main_bp.route('/contato', methods=['GET', 'POST'])
+@response_cache.exempt
 def contato():
     form = ContatoForm()
     if form.validate_on_submit():
         try:
-            msg = Message("Nova Mensagem do Site - Mente Magna",
-                          sender=current_app.config['MAIL_USERNAME'],
-                          recipients=[current_app.config['MAIL_USERNAME']])
-            msg.body = f"""
+            # A mensagem é gravada na fila e entregue em segundo plano
+            with instrumentation.timer('mail'):
+                outbox.enqueue(
+                    "Nova Mensagem do Site - Mente Magna",
+                    sender=current_app.config['MAIL_USERNAME'],
+                    recipients=[current_app.config['MAIL_USERNAME']],
+                    body=f"""
             De: {form.nome.data} <{form.email.data}>
             ---
             {form.mensagem.data}
-            """
-            mail.send(msg)
+            """)
             flash('Sua mensagem foi enviada com sucesso!', 'success')
             return redirect(url_for('main.contato'))
         except Exception as e:
@@ -70,4 +78,11 @@ def produto_maquinas_inteligentes():
 @main_bp.route('/produtos/manual-limpeza-escolar')
 def produto_manual_limpeza():
     """Exibe a landing page do livro de Limpeza Escolar."""
-    return render_template('products/manual-limpeza.html', title="Livro: Manual Avançado de Técnicas de Limpeza")
\ No newline at end of file
+    return render_template('products/manual-limpeza.html', title="Livro: Manual Avançado de Técnicas de Limpeza")
+
+@main_bp.route('/produtos/<string:slug>')
+def produto_detalhe(slug):
+    """Exibe a página de um produto cadastrado no banco de dados."""
+    produto = Product.query.filter_by(slug=slug).first_or_404()
+    return render_template('products/product_detail.html', produto=produto, title=produto.name,
+                           description=produto.short_description)
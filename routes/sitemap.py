@@ -1,39 +1,138 @@
-from flask import Blueprint, Response, url_for, request
-from models import Post
-from datetime import datetime
-import xml.etree.ElementTree as ET
+import gzip
+from xml.sax.saxutils import escape
+from flask import Blueprint, Response, url_for, request, current_app, abort
+from models import Post, Product
+from services.response_cache import response_cache
+from services.conditional import conditional_response, content_etag, site_last_modified
+from services.cache import local_cache
+from services import sidebar
 
 sitemap_bp = Blueprint('sitemap', __name__)
+response_cache.cache_blueprint(sitemap_bp, ttl=3600)
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+# Páginas estáticas incluídas no sitemap
+STATIC_ROUTES = [
+    'main.home', 'main.sobre', 'main.produtos', 'main.contato',
+    'main.produto_maquinas_inteligentes', 'main.produto_manual_limpeza',
+    'blog.blog', 'solutions.solutions_index',
+]
+
+def _date(value):
+    return value.strftime('%Y-%m-%d') if value else None
+
+def sitemap_entries():
+    """
+    Lista de (url, lastmod) de todo o site, em cache até o conteúdo mudar.
+
+    Os posts e produtos são lidos apenas com slug e datas, nunca o conteúdo.
+    """
+    def load():
+        site_lastmod = _date(site_last_modified())
+        entries = [(url_for(route, _external=True),
+                    site_lastmod if route in ('main.home', 'blog.blog') else None)
+                   for route in STATIC_ROUTES]
+
+        entries.extend((url_for('solutions.solution_detail', solution_slug=slug, _external=True), None)
+                       for slug in sidebar.active_solutions())
+
+        posts = (Post.query.with_entities(Post.slug, Post.data_criacao, Post.data_atualizacao)
+                 .filter_by(publicado=True).order_by(Post.id).yield_per(1000))
+        entries.extend((url_for('blog.post_detail', slug=slug, _external=True), _date(atualizacao or criacao))
+                       for slug, criacao, atualizacao in posts)
+
+        try:
+            products = Product.query.with_entities(Product.slug, Product.created_at).order_by(Product.id).yield_per(1000)
+            entries.extend((url_for('main.produto_detalhe', slug=slug, _external=True), _date(criado))
+                           for slug, criado in products)
+        except Exception as e:
+            current_app.logger.error(f"Erro ao buscar produtos para o sitemap: {e}")
+        return entries
+
+    # A URL externa depende do host da requisição
+    return local_cache.get_or_set(f'sitemap:entries:{request.host_url}', load,
+                                  current_app.config.get('SITEMAP_CACHE_TTL', 3600))
+
+def _shards():
+    """Divide as entradas em blocos de até SITEMAP_MAX_URLS (limite do protocolo: 50 mil)."""
+    entries = sitemap_entries()
+    size = current_app.config.get('SITEMAP_MAX_URLS', 50000)
+    return [entries[i:i + size] for i in range(0, len(entries), size)] or [[]]
+
+def _urlset(entries):
+    """Gera o XML de um <urlset> em partes, sem montar o documento inteiro em memória."""
+    yield XML_HEADER
+    yield f'<urlset xmlns="{SITEMAP_NS}">'
+    for loc, lastmod in entries:
+        if lastmod:
+            yield f'<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>'
+        else:
+            yield f'<url><loc>{escape(loc)}</loc></url>'
+    yield '</urlset>'
+
+def _sitemapindex(count):
+    # lastmod e URLs calculados aqui: o corpo é gerado depois que a view retorna,
+    # já fora do contexto da aplicação/requisição
+    lastmod = _date(site_last_modified())
+    gz = current_app.config.get('SITEMAP_GZIP', True)
+    endpoint = 'sitemap.sitemap_shard_gz' if gz else 'sitemap.sitemap_shard'
+    locs = [escape(url_for(endpoint, n=n, _external=True)) for n in range(1, count + 1)]
+
+    def generate():
+        yield XML_HEADER
+        yield f'<sitemapindex xmlns="{SITEMAP_NS}">'
+        for loc in locs:
+            yield f'<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>' if lastmod else \
+                f'<sitemap><loc>{loc}</loc></sitemap>'
+        yield '</sitemapindex>'
+    return generate()
+
+def _conditional(render):
+    last_modified = site_last_modified()
+    return conditional_response(render, etag=content_etag('sitemap', request.path, last_modified or ''),
+                                last_modified=last_modified)
+
+def _shard(n):
+    shards = _shards()
+    if not 1 <= n <= len(shards):
+        abort(404)
+    return shards[n - 1]
 
 @sitemap_bp.route('/sitemap.xml')
 def sitemap():
-    """Gera sitemap XML dinâmico"""
-    urlset = ET.Element('urlset', xmlns='http://www.sitemaps.org/schemas/sitemap/0.9')
-    
-    # Páginas estáticas
-    static_routes = ['main.home', 'main.sobre', 'main.produtos', 'main.contato', 'blog.blog', 'solutions.solutions_index']
-    for route in static_routes:
-        url_element = ET.SubElement(urlset, 'url')
-        loc = ET.SubElement(url_element, 'loc')
-        loc.text = url_for(route, _external=True)
-        lastmod = ET.SubElement(url_element, 'lastmod')
-        lastmod.text = datetime.now().strftime('%Y-%m-%d')
-    
-    # Posts do blog
-    posts = Post.query.filter_by(publicado=True).all()
-    for post in posts:
-        url_element = ET.SubElement(urlset, 'url')
-        loc = ET.SubElement(url_element, 'loc')
-        loc.text = url_for('blog.post_detail', slug=post.slug, _external=True)
-        lastmod = ET.SubElement(url_element, 'lastmod')
-        lastmod.text = post.data_atualizacao.strftime('%Y-%m-%d') if post.data_atualizacao else post.data_criacao.strftime('%Y-%m-%d')
-
-    xml_str = ET.tostring(urlset, encoding='unicode', method='xml')
-    return Response('<?xml version="1.0" encoding="UTF-8"?>' + xml_str, mimetype='application/xml')
+    """Sitemap XML; vira um índice de sitemaps quando passa do limite de URLs."""
+    def render():
+        shards = _shards()
+        body = _urlset(shards[0]) if len(shards) == 1 else _sitemapindex(len(shards))
+        return Response(body, mimetype='application/xml')
+    return _conditional(render)
+
+@sitemap_bp.route('/sitemap-<int:n>.xml')
+def sitemap_shard(n):
+    """Parte n do sitemap (quando o site passa de SITEMAP_MAX_URLS URLs)."""
+    def render():
+        return Response(_urlset(_shard(n)), mimetype='application/xml')
+    return _conditional(render)
+
+@sitemap_bp.route('/sitemap-<int:n>.xml.gz')
+def sitemap_shard_gz(n):
+    """Parte n do sitemap pré-comprimida em gzip (mantida em cache)."""
+    def render():
+        def compress():
+            return gzip.compress(''.join(_urlset(_shard(n))).encode('utf-8'))
+        data = local_cache.get_or_set(f'sitemap:gz:{request.host_url}:{n}', compress,
+                                      current_app.config.get('SITEMAP_CACHE_TTL', 3600))
+        return Response(data, mimetype='application/gzip')
+    return _conditional(render)
 
 @sitemap_bp.route('/robots.txt')
 def robots():
     """Gera robots.txt dinâmico"""
     sitemap_url = url_for('sitemap.sitemap', _external=True)
     robots_content = f"User-agent: *\nAllow: /\n\nSitemap: {sitemap_url}"
-    return Response(robots_content, mimetype='text/plain')
\ No newline at end of file
+    response = Response(robots_content, mimetype='text/plain')
+    # Conteúdo fixo: o ETag é o hash do próprio corpo
+    response.add_etag()
+    return response.make_conditional(request)
@@ -1,9 +1,16 @@
-from flask import Blueprint, render_template, request, jsonify, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, abort
 import json
+from services.response_cache import response_cache
+from services.code_search import get_index
 
 solutions_bp = Blueprint('solutions', __name__, url_prefix='/solucoes')
+response_cache.cache_blueprint(solutions_bp, ttl=3600)
 
 # --- CONFIGURAÇÃO CENTRAL DE SOLUÇÕES ---
+# 'type' define de onde vêm os resultados das consultas:
+#   'google_apps_script' -> o navegador chama o Apps Script ('deployment_id');
+#   'local_index'        -> busca local em /solucoes/<slug>/api/search, sobre o arquivo
+#                           'data_file' (CSV código;descrição ou JSON) em CODE_TABLES_FOLDER.
 SOLUTIONS_CONFIG = {
     'consulta-cid': {
         'name': 'Consulta CID',
@@ -72,7 +79,22 @@ def solution_detail(solution_slug):
         return render_template('404.html'), 404
     if solution['type'] == 'google_apps_script':
         solution['script_url'] = f"https://script.google.com/macros/s/{solution['deployment_id']}/exec"
+    elif solution['type'] == 'local_index':
+        # Mesmo contrato do Apps Script (?action=search&query=...), servido pela própria aplicação
+        solution['script_url'] = url_for('solutions.solution_search', solution_slug=solution_slug)
     
     # Renderiza o template a partir da pasta 'templates'
     template_path = solution['template'].replace('templates/', '')
-    return render_template(template_path, solution=solution)
\ No newline at end of file
+    return render_template(template_path, solution=solution)
+
+@solutions_bp.route('/<solution_slug>/api/search')
+def solution_search(solution_slug):
+    """Busca local (código por prefixo e descrição sem acentos) para soluções do tipo 'local_index'."""
+    solution = SOLUTIONS_CONFIG.get(solution_slug)
+    if not solution or solution['type'] != 'local_index':
+        abort(404)
+    query = (request.args.get('query') or request.args.get('q') or '').strip()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    if len(query) < 2:
+        return jsonify({'results': []})
+    return jsonify({'results': get_index(solution).search(query, limit)})
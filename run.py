@@ -3,7 +3,28 @@ from flask import Flask
 from config import config_by_name
 from extensions import db, migrate, mail, login_manager, csrf
 from models import User, Post
-from routes.solutions import SOLUTIONS_CONFIG
+from services.view_counter import view_counter
+from services import sidebar
+from services.cache import content_version
+from services.user_cache import user_cache
+from services.response_cache import response_cache
+from services.outbox import outbox
+from services.images import image_pipeline, images_lqip_command
+from services import storage
+from services import database
+from services import db_routing
+from services import search
+from services.search import search_reindex_command
+from services.related import related_updater
+from services.post_fields import posts_backfill_command
+from services.text import sanitize_html
+from services.fragment_cache import fragment_cache
+from services.instrumentation import instrumentation
+from services.metrics import metrics
+from services.benchmark import bench_seed_command, benchmark_command
+from services.freeze import freeze_scheduler
+from services.assets import assets
+from services import startup
 from flask.cli import with_appcontext
 import click
 
@@ -12,7 +33,8 @@ def create_app(config_name=None):
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'development')
         
-    app = Flask(__name__)
+    # FLASK_INSTANCE_PATH: pasta de instância alternativa (usada pelos testes)
+    app = Flask(__name__, instance_path=os.environ.get('FLASK_INSTANCE_PATH'))
     app.config.from_object(config_by_name[config_name])
 
     # Garante que as pastas de instância e uploads existam
@@ -20,11 +42,28 @@ def create_app(config_name=None):
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
     # Inicializa as extensões Flask
+    database.init_app(app)
+    db_routing.init_app(app)
     db.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
     login_manager.init_app(app)
     csrf.init_app(app)
+    # Primeiro hook before_request (e último after_request): mede a requisição inteira
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    view_counter.init_app(app)
+    content_version.init_app(app)
+    user_cache.init_app(app)
+    response_cache.init_app(app)
+    outbox.init_app(app)
+    image_pipeline.init_app(app)
+    storage.init_app(app)
+    assets.init_app(app)
+    related_updater.init_app(app)
+    fragment_cache.init_app(app)
+    freeze_scheduler.init_app(app)
+    startup.init_app(app)
 
     # Registra os Blueprints
     from routes.main import main_bp
@@ -40,14 +79,18 @@ def create_app(config_name=None):
     app.register_blueprint(solutions_bp, url_prefix='/solucoes')
     app.register_blueprint(sitemap_bp)
     app.register_blueprint(admin_bp, url_prefix='/admin')
+
+    # Sanitização na renderização, para posts ainda sem conteudo_renderizado
+    app.add_template_filter(sanitize_html, 'sanitize')
     
     # Context Processor para injetar dados no sidebar
     @app.context_processor
     def inject_sidebar_data():
         """Injeta dados no contexto de todos os templates."""
         try:
-            sidebar_posts = Post.query.filter_by(publicado=True).order_by(Post.data_criacao.desc()).limit(5).all()
-            sidebar_solutions = {k: v for k, v in SOLUTIONS_CONFIG.items() if v['status'] == 'active' and v.get('featured', False)}
+            # Dados em cache por processo; invalidados quando um Post é alterado
+            sidebar_posts = sidebar.recent_posts()[:sidebar.SIDEBAR_POSTS]
+            sidebar_solutions = sidebar.featured_solutions()
         except Exception as e:
             app.logger.error(f"Erro ao buscar dados para o sidebar: {e}")
             sidebar_posts = []
@@ -62,15 +105,25 @@ def create_app(config_name=None):
     app.cli.add_command(init_db_command)
     app.cli.add_command(create_admin_command)
     app.cli.add_command(set_password_command)
+    app.cli.add_command(search_reindex_command)
+    app.cli.add_command(posts_backfill_command)
+    app.cli.add_command(images_lqip_command)
+    app.cli.add_command(bench_seed_command)
+    app.cli.add_command(benchmark_command)
 
     return app
 
 @click.command('init-db')
 @with_appcontext
 def init_db_command():
-    """Cria as tabelas do banco de dados e um post de exemplo."""
+    """Cria as tabelas do banco de dados, o índice de busca e um post de exemplo."""
     db.create_all()
     click.echo('Banco de dados inicializado.')
+    # O índice de busca textual não é um model: sem ele a busca cai no LIKE
+    if search.reindex() is None:
+        click.echo('Busca textual não suportada neste banco: usando LIKE.')
+    else:
+        click.echo('Índice de busca criado.')
     
     if not Post.query.first():
         post_exemplo = Post(
@@ -112,7 +165,13 @@ def set_password_command(username):
     else:
         click.echo(f"Usuário '{username}' não encontrado.")
 
-app = create_app()
+def __getattr__(name):
+    # 'run.app' (flask run/shell com FLASK_APP=run) é criada só quando usada, uma vez;
+    # os servidores WSGI importam wsgi.py, que cria a sua própria aplicação
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
-    app.run()
\ No newline at end of file
+    create_app().run()
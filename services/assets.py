@@ -0,0 +1,163 @@
+"""
+Arquivos estáticos com hash do conteúdo no nome e versões pré-comprimidas.
+
+'flask assets-build' copia cada arquivo de static/ (exceto uploads/ e dist/) para
+static/dist/ como <nome>.<hash><ext>, gera .gz e .br (se o pacote brotli estiver
+instalado) para os arquivos de texto e grava static/dist/manifest.json.
+
+Na inicialização o manifesto é lido uma única vez: url_for('static', ...) passa a
+apontar para o arquivo com hash, servido com Cache-Control immutable de um ano, e
+a variante .br/.gz é entregue quando o Accept-Encoding permite. Sem manifesto
+(ou com ASSETS_USE_MANIFEST desligado, como em desenvolvimento), nada muda.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import click
+from flask import current_app, request, send_from_directory
+from flask.cli import with_appcontext
+from services.storage import ONE_YEAR
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+SKIP_DIRS = {'uploads', DIST_DIR}
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.xml', '.html', '.map', '.ico'}
+# Variantes pré-comprimidas, na ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+class Assets:
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.compressed = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        app.cli.add_command(assets_build_command)
+        if not app.config.get('ASSETS_USE_MANIFEST', True):
+            return
+        try:
+            with open(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.manifest = data.get('files', {})
+        # {arquivo em dist/: [codificações disponíveis]}, sem stat por requisição
+        self.compressed = {dist: set(encodings) for dist, encodings in data.get('compressed', {}).items()}
+        app.url_defaults(self._fingerprinted_url)
+        app.before_request(self._serve_precompressed)
+        app.after_request(self._immutable_headers)
+
+    def _fingerprinted_url(self, endpoint, values):
+        if endpoint == 'static':
+            dist = self.manifest.get(values.get('filename'))
+            if dist is not None:
+                values['filename'] = dist
+
+    def _serve_precompressed(self):
+        if request.endpoint != 'static':
+            return None
+        filename = (request.view_args or {}).get('filename', '')
+        encodings = self.compressed.get(filename)
+        if not encodings:
+            return None
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and accepted[encoding]:
+                response = send_from_directory(current_app.static_folder, filename + suffix,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return self._immutable_headers(response)
+        return None
+
+    def _immutable_headers(self, response):
+        if request.endpoint == 'static' and response.status_code in (200, 304) and \
+                (request.view_args or {}).get('filename', '').startswith(DIST_DIR + '/'):
+            response.cache_control.public = True
+            response.cache_control.max_age = ONE_YEAR
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+            if (request.view_args or {}).get('filename') in self.compressed:
+                response.vary.add('Accept-Encoding')
+        return response
+
+assets = Assets()
+
+def _source_files(static_folder):
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        if dirpath == static_folder:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+def _compress_brotli(data):
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+def build(static_folder, clean=False):
+    """Gera static/dist e o manifesto. Retorna (arquivos, variantes comprimidas, removidos)."""
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    files, compressed = {}, {}
+    written = set()
+    for relative, path in _source_files(static_folder):
+        with open(path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(relative)
+        dist = f"{DIST_DIR}/{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        target = os.path.join(static_folder, dist)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if not os.path.exists(target):
+            shutil.copyfile(path, target)
+        files[relative] = dist
+        written.add(os.path.abspath(target))
+
+        if ext.lower() not in COMPRESSIBLE:
+            continue
+        variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0), 'br': _compress_brotli(data)}
+        for encoding, suffix in ENCODINGS:
+            payload = variants[encoding]
+            # Só vale a pena se ficar menor que o original
+            if payload is None or len(payload) >= len(data):
+                continue
+            if not os.path.exists(target + suffix):
+                with open(target + suffix, 'wb') as f:
+                    f.write(payload)
+            compressed.setdefault(dist, []).append(encoding)
+            written.add(os.path.abspath(target + suffix))
+
+    manifest_path = os.path.join(dist_folder, MANIFEST_NAME)
+    os.makedirs(dist_folder, exist_ok=True)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({'files': files, 'compressed': compressed}, f, indent=2, sort_keys=True)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    written.add(os.path.abspath(manifest_path))
+
+    removed = 0
+    if clean:
+        # Versões antigas ficam por padrão: páginas em cache ainda podem apontar para elas
+        for dirpath, _dirnames, filenames in os.walk(dist_folder):
+            for name in filenames:
+                path = os.path.abspath(os.path.join(dirpath, name))
+                if path not in written:
+                    os.remove(path)
+                    removed += 1
+    return len(files), sum(len(v) for v in compressed.values()), removed
+
+@click.command('assets-build')
+@click.option('--clean', is_flag=True, help='Remove de static/dist as versões que não estão no novo manifesto.')
+@with_appcontext
+def assets_build_command(clean):
+    """Gera os arquivos estáticos com hash no nome e as versões .gz/.br."""
+    total, variants, removed = build(current_app.static_folder, clean)
+    click.echo(f"{total} arquivo(s), {variants} variante(s) comprimida(s), {removed} removido(s).")
+    click.echo("Reinicie a aplicação para carregar o novo manifesto.")
@@ -0,0 +1,317 @@
+"""
+Benchmark reproduzível das páginas principais.
+
+- 'flask bench-seed' popula o banco com volumes sintéticos (posts com HTML
+  realista e produtos) usando INSERTs em lote, com semente fixa.
+- 'flask benchmark' exercita as rotas reais pelo test client do Flask ou, com
+  --url, por HTTP contra um servidor local, com requisições concorrentes.
+  Reporta p50/p95/p99, vazão, consultas SQL por requisição e pico de memória, e
+  grava o resultado em reports/benchmark_<data>.json; --compare aponta
+  regressões em relação a um resultado anterior.
+"""
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, insert
+from extensions import db
+from services.cache import content_changed
+from services.post_fields import derive_fields
+
+WORDS = ('''
+    saude dados gestao clinica paciente sistema tecnologia desenvolvimento python flask banco consulta
+    atendimento enfermagem hospital pesquisa indicador qualidade processo equipe digital servico publico
+    software aplicacao web seguranca informacao prontuario municipio regulacao custo tabela codigo analise
+    relatorio painel automacao integracao cadastro protocolo cuidado prevencao vigilancia estrategia
+'''.split())
+CATEGORIES = ('Livros', 'Eletrônicos', 'Escritório', 'Saúde', 'Geral')
+SERVER_TIMING_QUERIES_RE = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# --- Dados sintéticos ---
+def _sentence(rng, words=(8, 20)):
+    text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(*words)))
+    return text[0].upper() + text[1:] + '.'
+
+def _html_body(rng):
+    parts = []
+    for _ in range(rng.randint(3, 8)):
+        parts.append(f'<h2>{_sentence(rng, (3, 6))[:-1]}</h2>')
+        parts.extend(f'<p>{" ".join(_sentence(rng) for _ in range(rng.randint(3, 7)))}</p>'
+                     for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.4:
+            parts.append('<ul>' + ''.join(f'<li>{_sentence(rng, (3, 8))}</li>' for _ in range(4)) + '</ul>')
+        if rng.random() < 0.2:
+            parts.append(f'<p><a href="https://example.com/{rng.randint(1, 999)}">{_sentence(rng, (2, 4))}</a></p>')
+    return '\n'.join(parts)
+
+def _post_rows(rng, start, count, now):
+    for i in range(start, start + count):
+        titulo = _sentence(rng, (4, 9))[:-1]
+        conteudo = _html_body(rng)
+        resumo = _sentence(rng, (12, 25)) if rng.random() < 0.7 else None
+        created = now - timedelta(minutes=i * 7 + rng.randint(0, 6))
+        row = dict(titulo=titulo, slug=f'bench-{i}', conteudo=conteudo, resumo=resumo, imagem=None,
+                   publicado=rng.random() < 0.95, data_criacao=created, data_atualizacao=None,
+                   views=rng.randint(0, 5000))
+        row.update(derive_fields(conteudo, resumo))
+        yield row
+
+def _product_rows(rng, start, count, now):
+    for i in range(start, start + count):
+        name = _sentence(rng, (2, 5))[:-1]
+        yield dict(name=name, slug=f'bench-produto-{i}', category=rng.choice(CATEGORIES),
+                   short_description=_sentence(rng), full_description_html=_html_body(rng),
+                   image_file='default.jpg', amazon_link=None, is_featured=rng.random() < 0.05,
+                   created_at=now - timedelta(hours=i))
+
+def _bulk_insert(table, rows, batch_size):
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        with db.engine.begin() as conn:
+            conn.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+def _next_suffix(column, prefix):
+    """Próximo N livre para slugs '<prefix>N' (o maior existente + 1, mesmo com lacunas)."""
+    pattern = re.compile(rf'{re.escape(prefix)}(\d+)')
+    numbers = (int(match.group(1)) for (slug,) in db.session.query(column).filter(column.like(f'{prefix}%'))
+               if (match := pattern.fullmatch(slug)))
+    return max(numbers, default=-1) + 1
+
+@click.command('bench-seed')
+@click.option('--posts', default=1000, show_default=True, help='Quantidade de posts a criar.')
+@click.option('--products', default=100, show_default=True, help='Quantidade de produtos a criar.')
+@click.option('--batch-size', default=2000, show_default=True, help='Linhas por INSERT em lote.')
+@click.option('--seed', default=42, show_default=True, help='Semente do gerador (dados reproduzíveis).')
+@with_appcontext
+def bench_seed_command(posts, products, batch_size, seed):
+    """Popula o banco com posts e produtos sintéticos para benchmarks."""
+    from models import Post, Product
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    # Continua a numeração de execuções anteriores (slugs bench-N são únicos)
+    post_start = _next_suffix(Post.slug, 'bench-')
+    product_start = _next_suffix(Product.slug, 'bench-produto-')
+
+    start = time.perf_counter()
+    # INSERT direto: os listeners do ORM (slug, índice de busca, relacionados) não rodam
+    created_posts = _bulk_insert(Post.__table__, _post_rows(rng, post_start, posts, now), batch_size)
+    created_products = _bulk_insert(Product.__table__, _product_rows(rng, product_start, products, now),
+                                    batch_size)
+    content_changed()
+    click.echo(f"{created_posts} post(s) e {created_products} produto(s) criados em "
+               f"{time.perf_counter() - start:.1f}s.")
+    click.echo("Atualize os índices com 'flask search-reindex' e 'flask related-rebuild'.")
+
+# --- Execução ---
+def percentile(values, p):
+    """Percentil pelo método do posto mais próximo (values já ordenados)."""
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, round(p / 100 * len(values) + 0.5) - 1))
+    return values[index]
+
+def _summary(durations, queries, errors, wall_time):
+    durations = sorted(durations)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        'requests': len(durations),
+        'errors': errors,
+        'mean_ms': ms(sum(durations) / len(durations)) if durations else None,
+        'p50_ms': ms(percentile(durations, 50)),
+        'p95_ms': ms(percentile(durations, 95)),
+        'p99_ms': ms(percentile(durations, 99)),
+        'max_ms': ms(durations[-1]) if durations else None,
+        'throughput_rps': round(len(durations) / wall_time, 1) if wall_time else None,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+    }
+
+class _QueryCounter:
+    """Conta as consultas SQL por thread (cada thread atende uma requisição por vez)."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db.engine, 'before_cursor_execute', self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+    def take(self):
+        count = getattr(self._local, 'count', 0)
+        self._local.count = 0
+        return count
+
+def _client_request(app, admin_id):
+    """Função de requisição pelo test client (um cliente por thread)."""
+    local = threading.local()
+
+    def do(path):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+            if admin_id is not None:
+                with client.session_transaction() as session:
+                    session['_user_id'] = str(admin_id)
+                    session['_fresh'] = True
+        response = client.get(path)
+        response.get_data()
+        return response.status_code, None
+    return do
+
+def _http_request(base_url):
+    """Função de requisição por HTTP (lê a contagem de consultas do Server-Timing, se houver)."""
+    def do(path):
+        try:
+            with urllib.request.urlopen(base_url.rstrip('/') + path, timeout=30) as response:
+                response.read()
+                match = SERVER_TIMING_QUERIES_RE.search(response.headers.get('Server-Timing', ''))
+                return response.status, int(match.group(1)) if match else None
+        except urllib.error.HTTPError as e:
+            return e.code, None
+    return do
+
+def run_route(do, path, requests, concurrency, counter=None):
+    def one(_):
+        start = time.perf_counter()
+        status, queries = do(path)
+        elapsed = time.perf_counter() - start
+        if counter is not None:
+            queries = counter.take()
+        return elapsed, status, queries
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(one, range(requests)))
+    wall_time = time.perf_counter() - start
+    ok = [r for r in results if r[1] < 400]
+    return _summary([r[0] for r in ok], [r[2] for r in ok if r[2] is not None],
+                    len(results) - len(ok), wall_time)
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=current_app.root_path, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(result, baseline, threshold):
+    """Lista as rotas cujo p95 piorou mais que threshold (%) em relação ao baseline."""
+    regressions = []
+    for route, current in result['routes'].items():
+        previous = baseline.get('routes', {}).get(route)
+        if not previous or not previous.get('p95_ms') or current.get('p95_ms') is None:
+            continue
+        change = (current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100
+        click.echo(f"  {route:<30} p95 {previous['p95_ms']:>8.1f} -> {current['p95_ms']:>8.1f} ms "
+                   f"({change:+.1f}%)")
+        if change > threshold:
+            regressions.append(route)
+    return regressions
+
+@click.command('benchmark')
+@click.option('--requests', 'requests_per_route', default=200, show_default=True, help='Requisições por rota.')
+@click.option('--concurrency', default=1, show_default=True, help='Requisições simultâneas.')
+@click.option('--warmup', default=10, show_default=True, help='Requisições de aquecimento por rota (descartadas).')
+@click.option('--url', 'base_url', help='Testa por HTTP um servidor em execução (ex.: http://127.0.0.1:8000).')
+@click.option('--output', type=click.Path(dir_okay=False), help='Arquivo JSON (padrão: reports/benchmark_<data>.json).')
+@click.option('--compare', 'baseline_path', type=click.Path(exists=True, dir_okay=False),
+              help='Resultado anterior para comparação.')
+@click.option('--threshold', default=10.0, show_default=True, help='Piora de p95 (%) considerada regressão.')
+@with_appcontext
+def benchmark_command(requests_per_route, concurrency, warmup, base_url, output, baseline_path, threshold):
+    """Mede latência, vazão e consultas por requisição das rotas principais."""
+    from models import Post, User
+    app = current_app._get_current_object()
+    slugs = [s for (s,) in db.session.query(Post.slug).filter(Post.publicado == True)
+             .order_by(func.random()).limit(50)]
+    admin = db.session.query(User.id).first()
+    routes = ['/', '/blog/', '/sitemap.xml', '/solucoes/']
+    if slugs:
+        routes.insert(2, '/blog/<slug>')
+    if admin or base_url:
+        routes.append('/admin/')
+    if base_url:
+        # Por HTTP não há sessão de administrador; /admin/ mede o redirecionamento
+        do = admin_do = _http_request(base_url)
+        counter = None
+    else:
+        # Páginas públicas como visitante anônimo; /admin/ com a sessão de um administrador
+        do, admin_do = _client_request(app, None), _client_request(app, admin.id if admin else None)
+        counter = _QueryCounter()
+
+    rng = random.Random(0)
+    result = {
+        'generated_at': datetime.utcnow().isoformat(),
+        'git_commit': _git_commit(),
+        'mode': 'http' if base_url else 'test_client',
+        'target': base_url,
+        'config': {'requests': requests_per_route, 'concurrency': concurrency, 'warmup': warmup,
+                   'database': db.engine.url.get_backend_name(),
+                   'response_cache': app.config.get('RESPONSE_CACHE_BACKEND'),
+                   'fragment_cache': app.config.get('FRAGMENT_CACHE_BACKEND')},
+        'posts': db.session.query(func.count(Post.id)).scalar(),
+        'routes': {},
+    }
+    db.session.remove()
+
+    with counter if counter is not None else nullcontext():
+        for route in routes:
+            if route == '/blog/<slug>':
+                route_do = lambda _path: do(f'/blog/{rng.choice(slugs)}')
+            else:
+                route_do = admin_do if route == '/admin/' else do
+            for _ in range(warmup):
+                route_do(route)
+            if counter is not None:
+                counter.take()
+            summary = run_route(route_do, route, requests_per_route, concurrency, counter)
+            result['routes'][route] = summary
+            click.echo(f"{route:<16} p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+                       f"p99 {summary['p99_ms']} ms  {summary['throughput_rps']} req/s  "
+                       f"consultas/req {summary['queries_per_request']}  erros {summary['errors']}")
+
+    # ru_maxrss está em KB no Linux (do próprio processo: no modo HTTP, o cliente)
+    result['peak_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    click.echo(f"Pico de memória: {result['peak_rss_mb']} MB")
+
+    output = output or os.path.join(app.root_path, 'reports',
+                                    f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    click.echo(f"Resultado gravado em {output}")
+
+    if baseline_path:
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        click.echo(f"Comparação com {baseline_path} ({baseline.get('git_commit') or 'sem commit'}):")
+        regressions = compare(result, baseline, threshold)
+        if regressions:
+            raise click.ClickException(f"Regressão de p95 acima de {threshold}% em: {', '.join(regressions)}")
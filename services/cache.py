@@ -0,0 +1,327 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha1
+
+_MISSING = object()
+
+class TTLCache:
+    """Cache simples em memória (por processo) com expiração por item."""
+
+    def __init__(self, default_ttl=300):
+        self.default_ttl = default_ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            with self._lock:
+                self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Retorna o valor em cache ou o calcula com factory() e o armazena."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class LRUCache(TTLCache):
+    """
+    Cache em memória com expiração e despejo LRU, limitado por número de itens
+    e por tamanho total (em bytes, informado por quem grava).
+    """
+
+    def __init__(self, default_ttl=300, max_entries=1000, max_bytes=64 * 1024 * 1024):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value, size = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self._bytes -= size
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, size=0):
+        ttl = self.default_ttl if ttl is None else ttl
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._data[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._data.popitem(last=False)
+                self._bytes -= evicted
+
+    def delete(self, key):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+class FileSystemCache:
+    """
+    Cache em disco compartilhado entre processos (ex.: workers do gunicorn).
+    Cada item é um arquivo com (expiração, valor) serializado com pickle.
+
+    Limitado por número de itens e bytes no disco: a cada prune_every gravações
+    (por processo), acima dos limites, saem os itens usados há mais tempo (pela
+    data de modificação, renovada nas leituras). Itens vencidos são removidos ao
+    serem lidos.
+    """
+
+    def __init__(self, directory, default_ttl=300, max_entries=1000, max_bytes=64 * 1024 * 1024,
+                 prune_every=50):
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def _path(self, key):
+        return os.path.join(self.directory, sha1(key.encode('utf-8')).hexdigest())
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                expires, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        if expires < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return default
+        try:
+            os.utime(path)  # marca como usado recentemente
+        except OSError:
+            pass
+        return value
+
+    def set(self, key, value, ttl=None, size=0):
+        ttl = self.default_ttl if ttl is None else ttl
+        # Grava em arquivo temporário e renomeia: leitores nunca veem um item pela metade
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((time.time() + ttl, value), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+        with self._lock:
+            self._writes += 1
+            due = self._writes % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        """Acima dos limites, remove os itens usados há mais tempo."""
+        now = time.time()
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            # Temporários esquecidos por uma gravação interrompida
+            if name.endswith('.tmp'):
+                if now - st.st_mtime > 60:
+                    self._remove(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+class NullCache:
+    """Backend que nunca armazena nada (cache desativado)."""
+
+    def get(self, key, default=None):
+        return default
+
+    def set(self, key, value, ttl=None, size=0):
+        pass
+
+    def get_or_set(self, key, factory, ttl=None):
+        return factory()
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+def make_cache(backend, directory=None, default_ttl=300, max_entries=1000, max_bytes=64 * 1024 * 1024):
+    """Cria o backend de cache configurado: 'memory', 'filesystem' ou 'null'."""
+    if backend == 'memory':
+        return LRUCache(default_ttl, max_entries, max_bytes)
+    if backend == 'filesystem':
+        return FileSystemCache(directory, default_ttl, max_entries, max_bytes)
+    if backend == 'null':
+        return NullCache()
+    raise ValueError(f"Backend de cache desconhecido: {backend}")
+
+local_cache = TTLCache()
+
+# --- Invalidação por alteração de conteúdo (Post/Product) ---
+_content_change_callbacks = []
+
+def on_content_change(func):
+    """Registra uma função chamada sempre que um Post ou Product é alterado."""
+    _content_change_callbacks.append(func)
+    return func
+
+def _run_callbacks():
+    for callback in _content_change_callbacks:
+        callback()
+
+class ContentVersion:
+    """
+    Versão global do conteúdo, compartilhada entre processos por um arquivo.
+
+    Entra nas chaves dos caches: ao mudar, todas as entradas antigas deixam de ser
+    usadas. Cada processo relê o arquivo no máximo uma vez por check_interval e,
+    se outro processo alterou a versão, limpa também os seus caches locais.
+    Outras versões (ex.: a dos usuários) usam um nome e callbacks próprios.
+    """
+
+    def __init__(self, name='content_version', callbacks=None):
+        self.name = name
+        self.callbacks = _content_change_callbacks if callbacks is None else callbacks
+        self.path = None
+        self.check_interval = 1.0
+        self._value = '0'
+        self._checked_at = 0.0
+
+    def init_app(self, app):
+        self.path = os.path.join(app.instance_path, self.name)
+        self.check_interval = app.config.get('CONTENT_VERSION_CHECK_INTERVAL', 1.0)
+        self._value = self._read() or '0'
+        self._checked_at = time.monotonic()
+        app.before_request(self._sync)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip()
+        except (OSError, TypeError):
+            return None
+
+    def _sync(self):
+        self.current()
+
+    def current(self):
+        """Versão atual; detecta alterações feitas por outros processos."""
+        now = time.monotonic()
+        if self.path and now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            value = self._read()
+            if value and value != self._value:
+                self._value = value
+                for callback in self.callbacks:
+                    callback()
+        return self._value
+
+    def bump(self):
+        """Gera uma nova versão (time_ns evita corrida de leitura-incremento entre processos)."""
+        self._value = str(time.time_ns())
+        self._checked_at = time.monotonic()
+        if self.path:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(self._value)
+            os.replace(tmp, self.path)
+        return self._value
+
+content_version = ContentVersion()
+
+def content_changed():
+    """Notifica os caches (deste e dos demais processos) de que o conteúdo mudou."""
+    content_version.bump()
+    _run_callbacks()
+
+on_content_change(local_cache.clear)
@@ -0,0 +1,141 @@
+import csv
+import heapq
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from flask import current_app
+from services.text import normalize
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+# Palavras muito comuns que não ajudam a distinguir descrições
+STOPWORDS = {'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'a', 'o', 'as', 'os', 'com', 'sem', 'por', 'para', 'ou', 'na', 'no'}
+
+def normalize_code(code):
+    return re.sub(r'[^0-9A-Z]', '', (code or '').upper())
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(normalize(text)) if t not in STOPWORDS]
+
+class CodeIndex:
+    """
+    Índice em memória de uma tabela de códigos (CID, CBO, SIGTAP...).
+
+    - códigos normalizados ordenados, para busca por prefixo com bisect;
+    - índice invertido token -> ids (array compacto), com a lista de tokens
+      ordenada para completar o último termo digitado como prefixo;
+    - posição da primeira ocorrência de cada token em cada descrição, usada no
+      ranking sem tokenizar os candidatos a cada consulta.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries  # [(código, descrição)]
+        codes = sorted((normalize_code(code), i) for i, (code, _) in enumerate(entries))
+        self.codes = [c for c, _ in codes]
+        self.code_ids = array('I', (i for _, i in codes))
+
+        postings = {}
+        self.lengths = array('H')
+        self.positions = []  # por descrição: {token: posição da primeira ocorrência}
+        for i, (_, description) in enumerate(entries):
+            tokens = tokenize(description)
+            self.lengths.append(min(len(tokens), 65535))
+            positions = {}
+            for position, token in enumerate(tokens):
+                positions.setdefault(token, position)
+            self.positions.append(positions)
+            for token in positions:
+                postings.setdefault(token, array('I')).append(i)
+        self.postings = postings
+        self.tokens = sorted(postings)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um arquivo CSV (código;descrição ou código,descrição) ou JSON."""
+        if path.endswith('.json'):
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                entries = list(data.items())
+            else:
+                entries = [(item['code'], item['description']) for item in data]
+        else:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                sample = f.read(4096)
+                f.seek(0)
+                dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+                rows = csv.reader(f, dialect)
+                entries = [(row[0].strip(), row[1].strip()) for row in rows if len(row) >= 2]
+            # Descarta o cabeçalho, se houver
+            if entries and entries[0][0].lower() in ('code', 'codigo', 'código', 'cod'):
+                entries = entries[1:]
+        return cls(entries)
+
+    def _code_prefix(self, prefix):
+        start = bisect_left(self.codes, prefix)
+        end = bisect_left(self.codes, prefix + '\uffff')
+        return self.code_ids[start:end]
+
+    def _token_ids(self, token, prefix=False):
+        if not prefix:
+            return set(self.postings.get(token, ()))
+        # Palavras que começam com o termo (bisect na lista ordenada de tokens)
+        ids = set()
+        start = bisect_left(self.tokens, token)
+        for t in self.tokens[start:bisect_left(self.tokens, token + '\uffff')]:
+            ids.update(self.postings[t])
+        return ids
+
+    def search(self, query, limit=20):
+        """Retorna até limit resultados ordenados por relevância."""
+        results = []
+        seen = set()
+
+        # 1) Código: correspondência exata primeiro, depois prefixo (códigos mais curtos antes)
+        code = normalize_code(query)
+        if any(ch.isdigit() for ch in code):
+            matches = sorted(self._code_prefix(code), key=lambda i: (len(self.entries[i][0]), self.entries[i][0]))
+            for i in matches[:limit]:
+                results.append(i)
+                seen.add(i)
+
+        # 2) Descrição: todos os termos precisam aparecer, ao menos como início de palavra
+        tokens = tokenize(query)
+        if tokens and len(results) < limit:
+            candidates = None
+            for token in tokens:
+                ids = self._token_ids(token, prefix=True)
+                candidates = ids if candidates is None else candidates & ids
+                if not candidates:
+                    break
+            if candidates:
+                def score(i):
+                    positions = self.positions[i]
+                    exact = sum(1 for t in tokens if t in positions)
+                    return (-exact, positions.get(tokens[0], self.lengths[i]), self.lengths[i], self.entries[i][0])
+                results.extend(heapq.nsmallest(limit - len(results), candidates - seen, key=score))
+
+        return [{'code': self.entries[i][0], 'description': self.entries[i][1]} for i in results]
+
+_indexes = {}
+_lock = threading.Lock()
+
+def get_index(solution):
+    """Índice da solução, carregado uma vez por processo (recarregado se o arquivo mudar)."""
+    path = os.path.join(current_app.config['CODE_TABLES_FOLDER'], solution['data_file'])
+    try:
+        mtime = os.path.getmtime(path)
+        cached = _indexes.get(path)
+        if cached is None or cached[0] != mtime:
+            with _lock:
+                cached = _indexes.get(path)
+                if cached is None or cached[0] != mtime:
+                    cached = (mtime, CodeIndex.load(path))
+                    _indexes[path] = cached
+    except (OSError, ValueError, csv.Error) as e:
+        # Tabela ausente ou ilegível: a busca fica vazia em vez de responder 500
+        current_app.logger.error(f"Tabela de códigos indisponível ({path}): {e}")
+        return CodeIndex([])
+    return cached[1]
@@ -0,0 +1,50 @@
+from flask import request, session, make_response, current_app
+from sqlalchemy import func
+from extensions import db
+from models import Post
+from services.cache import local_cache, content_version
+
+def site_last_modified():
+    """Data da alteração mais recente entre os posts publicados (em cache até o conteúdo mudar)."""
+    def load():
+        criacao, atualizacao = (db.session.query(func.max(Post.data_criacao), func.max(Post.data_atualizacao))
+                                .filter(Post.publicado == True).one())
+        dates = [d for d in (criacao, atualizacao) if d is not None]
+        return max(dates) if dates else None
+    return local_cache.get_or_set('conditional:site_last_modified', load,
+                                  current_app.config.get('SIDEBAR_CACHE_TTL', 300))
+
+def content_etag(prefix, *parts):
+    """ETag fraco derivado da versão global do conteúdo e de partes específicas da página."""
+    values = [prefix, content_version.current()]
+    values.extend(p.strftime('%Y%m%d%H%M%S%f') if hasattr(p, 'strftime') else str(p) for p in parts)
+    return '-'.join(values)
+
+def _has_flashes():
+    if not request.cookies.get(current_app.config['SESSION_COOKIE_NAME']):
+        return False
+    return '_flashes' in session
+
+def conditional_response(render, etag=None, last_modified=None):
+    """
+    Responde 304 quando os validadores da requisição (If-None-Match /
+    If-Modified-Since) coincidem, sem chamar render(). Caso contrário renderiza
+    e devolve a resposta com ETag e Last-Modified.
+    """
+    def with_validators(response):
+        if etag:
+            response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        # Permite armazenar, mas obriga o navegador a revalidar (o que custa só um 304)
+        response.cache_control.no_cache = True
+        return response
+
+    # Mensagens flash precisam ser exibidas: nunca responder 304 nesse caso
+    if request.method in ('GET', 'HEAD') and not _has_flashes():
+        probe = with_validators(current_app.response_class())
+        probe.make_conditional(request)
+        if probe.status_code == 304:
+            return probe
+
+    return with_validators(make_response(render()))
@@ -0,0 +1,122 @@
+"""
+Ajustes do engine do banco de dados.
+
+- SQLite: PRAGMAs aplicados a cada nova conexão (WAL, synchronous=NORMAL,
+  busy_timeout, cache, mmap, temp_store, foreign_keys). Com WAL, leitores não
+  são bloqueados por quem está gravando (views, admin), e o busy_timeout faz os
+  escritores concorrentes esperarem em vez de falharem com 'database is locked'.
+- PostgreSQL/MySQL: tamanho do pool, reciclagem e pre-ping das conexões.
+
+Os valores padrão entram em SQLALCHEMY_ENGINE_OPTIONS sem sobrescrever o que já
+estiver configurado. 'flask db-health' mostra as configurações efetivas.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from extensions import db
+
+def engine_options(uri, config):
+    """Opções do create_engine adequadas ao banco da URI."""
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    if backend == 'sqlite':
+        # timeout do driver (s): espera pelo lock antes mesmo do busy_timeout
+        return {'connect_args': {'timeout': config.get('SQLITE_BUSY_TIMEOUT_MS', 5000) / 1000}}
+    if backend in ('postgresql', 'mysql'):
+        return {
+            'pool_size': config.get('DB_POOL_SIZE', 5),
+            'max_overflow': config.get('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': config.get('DB_POOL_TIMEOUT', 30),
+            # Abaixo do wait_timeout dos servidores MySQL compartilhados
+            'pool_recycle': config.get('DB_POOL_RECYCLE', 280),
+            'pool_pre_ping': True,
+        }
+    return {}
+
+def init_app(app):
+    """Completa SQLALCHEMY_ENGINE_OPTIONS (chamar antes de db.init_app)."""
+    defaults = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+    configured = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    connect_args = {**defaults.pop('connect_args', {}), **configured.pop('connect_args', {})}
+    options = {**defaults, **configured}
+    if connect_args:
+        options['connect_args'] = connect_args
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    _sqlite_pragmas.update(app.config.get('SQLITE_PRAGMAS', {}))
+    _sqlite_pragmas['busy_timeout'] = app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    if not event.contains(Engine, 'connect', _set_sqlite_pragmas):
+        event.listen(Engine, 'connect', _set_sqlite_pragmas)
+    app.cli.add_command(db_health_command)
+
+_sqlite_pragmas = {}
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+    finally:
+        cursor.close()
+
+SQLITE_REPORTED_PRAGMAS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size',
+                           'temp_store', 'foreign_keys', 'page_size')
+
+def health_report():
+    engine = db.engine
+    backend = engine.url.get_backend_name()
+    pool = engine.pool
+    report = {
+        'generated_at': datetime.utcnow().isoformat(),
+        'backend': backend,
+        'driver': engine.url.get_driver_name(),
+        'url': engine.url.render_as_string(hide_password=True),
+        'pool': {'class': type(pool).__name__, 'status': pool.status()},
+        'engine_options': {k: v for k, v in current_app.config['SQLALCHEMY_ENGINE_OPTIONS'].items()
+                           if k != 'connect_args'},
+    }
+    with engine.connect() as conn:
+        if backend == 'sqlite':
+            report['pragmas'] = {name: conn.execute(text(f'PRAGMA {name}')).scalar()
+                                 for name in SQLITE_REPORTED_PRAGMAS}
+            report['integrity'] = conn.execute(text('PRAGMA quick_check')).scalar()
+            database = engine.url.database
+            if database and database != ':memory:' and os.path.exists(database):
+                report['file_size_mb'] = round(os.path.getsize(database) / 1024 / 1024, 2)
+                wal = database + '-wal'
+                report['wal_size_mb'] = round(os.path.getsize(wal) / 1024 / 1024, 2) if os.path.exists(wal) else 0
+        elif backend == 'postgresql':
+            report['server'] = {
+                'version': conn.execute(text('SHOW server_version')).scalar(),
+                'max_connections': conn.execute(text('SHOW max_connections')).scalar(),
+                'connections': conn.execute(text('SELECT count(*) FROM pg_stat_activity')).scalar(),
+            }
+        elif backend == 'mysql':
+            report['server'] = {
+                'version': conn.execute(text('SELECT VERSION()')).scalar(),
+                'wait_timeout': conn.execute(text('SELECT @@wait_timeout')).scalar(),
+                'max_connections': conn.execute(text('SELECT @@max_connections')).scalar(),
+            }
+    return report
+
+@click.command('db-health')
+@click.option('--save', is_flag=True, help='Grava o relatório em reports/db_health_<data>.json.')
+@with_appcontext
+def db_health_command(save):
+    """Mostra as configurações efetivas do banco de dados (PRAGMAs, pool, servidor)."""
+    report = health_report()
+    click.echo(json.dumps(report, indent=2, ensure_ascii=False, default=str))
+    if save:
+        path = os.path.join(current_app.root_path, 'reports',
+                            f"db_health_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+        click.echo(f"Relatório gravado em {path}")
@@ -0,0 +1,145 @@
+"""
+Leitura em réplica do banco de dados (opcional, ativada por DATABASE_READ_URL).
+
+A RoutingSession envia para a réplica (bind 'replica') apenas os SELECTs de
+requisições GET/HEAD públicas de visitantes anônimos. Vão para o banco principal:
+- escritas e tudo o que acontece depois de um flush na mesma sessão
+  (leitura após escrita);
+- requisições do admin e do login, e de usuários autenticados;
+- código fora de requisições (CLI, workers em segundo plano).
+
+Se a réplica falhar, a leitura que falhou é repetida uma vez no principal (a
+requisição não vira um 500), e a réplica é marcada como indisponível: as leituras
+voltam para o principal até a próxima verificação (a cada REPLICA_RETRY_INTERVAL
+segundos).
+Para testar localmente, aponte DATABASE_READ_URL para uma cópia do arquivo SQLite
+(ou para um segundo banco PostgreSQL local).
+"""
+import threading
+import time
+from flask import current_app, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.sql import Select
+
+REPLICA_BIND = 'replica'
+# Blueprints que sempre leem do banco principal
+PRIMARY_BLUEPRINTS = {'admin', 'auth'}
+
+class ReplicaHealth:
+    """Estado da réplica por processo: disponível, ou indisponível até um instante."""
+
+    def __init__(self):
+        self._down_until = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def mark_down(self, retry_interval):
+        self._down_until = time.monotonic() + retry_interval
+
+    def available(self, engine, retry_interval):
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if now - self._checked_at < retry_interval:
+            return True
+        with self._lock:
+            if now - self._checked_at < retry_interval:
+                return True
+            self._checked_at = now
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text('SELECT 1'))
+            except Exception as e:
+                current_app.logger.warning(f"Réplica de leitura indisponível: {e}")
+                self.mark_down(retry_interval)
+                return False
+        return True
+
+replica_health = ReplicaHealth()
+
+class RoutingSession(Session):
+    """Session do Flask-SQLAlchemy que escolhe entre o banco principal e a réplica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and isinstance(clause, Select) and self._read_from_replica():
+            self.info['replica_used'] = True
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._primary_fallback(super().execute, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._primary_fallback(super().scalars, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._primary_fallback(super().scalar, *args, **kwargs)
+
+    def _primary_fallback(self, method, *args, **kwargs):
+        """Executa a instrução; se ela falhou na réplica, repete uma vez no principal."""
+        self.info.pop('replica_used', None)
+        try:
+            return method(*args, **kwargs)
+        except DBAPIError as e:
+            if not self.info.pop('replica_used', False):
+                raise
+            error = e
+        # O restante da sessão (da requisição) também lê do principal
+        self.info['replica_failed'] = True
+        result = method(*args, **kwargs)
+        # O principal respondeu: a falha era da réplica
+        current_app.logger.warning(f"Leitura na réplica falhou, repetida no banco principal: {error}")
+        replica_health.mark_down(current_app.config.get('REPLICA_RETRY_INTERVAL', 30))
+        return result
+
+    def _read_from_replica(self):
+        if (REPLICA_BIND not in self._db.engines or self.info.get('wrote') or self.info.get('replica_failed')
+                or self._flushing):
+            return False
+        if not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return False
+        if request.blueprint in PRIMARY_BLUEPRINTS or not _is_anonymous():
+            return False
+        return replica_health.available(self._db.engines[REPLICA_BIND],
+                                        current_app.config.get('REPLICA_RETRY_INTERVAL', 30))
+
+def _is_anonymous():
+    from services.response_cache import is_anonymous_request
+    return is_anonymous_request()
+
+def _mark_write(session, flush_context):
+    session.info['wrote'] = True
+
+def engine_bind(app):
+    """Configuração do bind 'replica' para SQLALCHEMY_BINDS (None sem DATABASE_READ_URL)."""
+    url = app.config.get('DATABASE_READ_URL')
+    if not url:
+        return None
+    from services.database import engine_options
+    options = engine_options(url, app.config)
+    # connect_args sempre explícito: não herda os do banco principal (outro driver)
+    options.setdefault('connect_args', {})
+    return {'url': url, **options}
+
+def init_app(app):
+    """Registra o bind da réplica (chamar antes de db.init_app)."""
+    bind = engine_bind(app)
+    if bind is None:
+        return
+    app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), REPLICA_BIND: bind}
+    replica_url = make_url(bind['url'])
+    retry_interval = app.config.get('REPLICA_RETRY_INTERVAL', 30)
+
+    def handle_error(context):
+        # Falha de conexão na réplica: as próximas leituras vão para o principal
+        engine = context.engine
+        if engine is not None and engine.url == replica_url and (
+                context.is_disconnect or isinstance(context.sqlalchemy_exception, OperationalError)):
+            replica_health.mark_down(retry_interval)
+
+    event.listen(Engine, 'handle_error', handle_error)
+    if not event.contains(RoutingSession, 'after_flush', _mark_write):
+        event.listen(RoutingSession, 'after_flush', _mark_write)
@@ -0,0 +1,86 @@
+import os
+import threading
+from collections import Counter
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from services.cache import make_cache, content_version, on_content_change, NullCache
+from services.metrics import metrics
+
+class FragmentCache:
+    """
+    Cache de trechos de template, para páginas que não podem ser cacheadas
+    inteiras (formulários com CSRF, mensagens flash, sessão do admin):
+
+        {% cache 'sidebar' %} ... {% endcache %}
+        {% cache ('post-body', post.id), 3600 %} ... {% endcache %}
+
+    A chave inclui a versão global do conteúdo, então qualquer alteração em
+    Post/Product invalida todos os trechos. Os acertos/falhas são contados por
+    nome de trecho (o primeiro elemento da chave) para ajustar os TTLs.
+    """
+
+    def __init__(self, app=None):
+        self.cache = NullCache()
+        self.hits = Counter()
+        self.misses = Counter()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('FRAGMENT_CACHE_BACKEND', 'memory')
+        self.cache = make_cache(
+            backend,
+            directory=app.config.get('FRAGMENT_CACHE_DIR') or os.path.join(app.instance_path, 'fragment_cache'),
+            default_ttl=app.config.get('FRAGMENT_CACHE_DEFAULT_TTL', 600),
+            max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 2000),
+            max_bytes=app.config.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024),
+        )
+        app.extensions['fragment_cache'] = self
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        if backend != 'null':
+            on_content_change(self.cache.clear)
+
+    @staticmethod
+    def _parts(key):
+        return tuple(key) if isinstance(key, (tuple, list)) else (key,)
+
+    def make_key(self, key):
+        return 'fragment:' + content_version.current() + ':' + ':'.join(str(p) for p in self._parts(key))
+
+    def render(self, key, ttl, caller):
+        name = str(self._parts(key)[0])
+        full_key = self.make_key(key)
+        value = self.cache.get(full_key)
+        with self._lock:
+            (self.misses if value is None else self.hits)[name] += 1
+        metrics.cache_event('fragment', value is not None)
+        if value is None:
+            value = str(caller())
+            self.cache.set(full_key, value, ttl, size=len(value))
+        return Markup(value)
+
+    def stats(self):
+        """Acertos, falhas e taxa de acerto por trecho (contadores deste processo)."""
+        with self._lock:
+            names = set(self.hits) | set(self.misses)
+            return {name: {'hits': self.hits[name], 'misses': self.misses[name],
+                           'ratio': self.hits[name] / ((self.hits[name] + self.misses[name]) or 1)}
+                    for name in sorted(names)}
+
+fragment_cache = FragmentCache()
+
+class FragmentCacheExtension(Extension):
+    """Tag {% cache chave[, ttl] %}...{% endcache %} (ttl em segundos; padrão FRAGMENT_CACHE_DEFAULT_TTL)."""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        ttl = parser.parse_expression() if parser.stream.skip_if('comma') else nodes.Const(None)
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [key, ttl]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        return fragment_cache.render(key, ttl, caller)
@@ -0,0 +1,279 @@
+"""
+Exportação estática ("freeze") das páginas públicas.
+
+'flask freeze' renderiza pela própria aplicação todas as URLs públicas (home,
+páginas institucionais e legais, produtos, blog, posts, soluções, sitemap e
+robots.txt) para FREEZE_DIR, de onde o nginx/Passenger ou uma CDN podem servi-las
+direto. Os workers Python ficam só com o admin, o contato, a busca e a paginação.
+
+A renderização é paralela e incremental: o manifesto .freeze-manifest.json guarda,
+para cada página, a impressão digital das dependências usadas (o post, a listagem
+de posts recentes, o sidebar, os relacionados, o produto, o sitemap e os
+templates). Numa nova execução só as páginas cujas dependências mudaram são
+renderizadas de novo, e as de posts despublicados/excluídos são removidas.
+
+As páginas geradas não contam visualizações. Exemplo para o nginx (a listagem
+paginada do blog usa query string e deve continuar indo para a aplicação):
+
+    location / {
+        if ($args) { proxy_pass http://app; }
+        try_files $uri $uri/index.html @app;
+    }
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import Post, Product, RelatedPost
+from services.view_counter import NOT_A_VIEW_ENVIRON_KEY
+
+MANIFEST_NAME = '.freeze-manifest.json'
+# Páginas sem dados do banco (dependem só dos templates)
+STATIC_ENDPOINTS = ['main.sobre', 'main.produtos', 'main.termos', 'main.privacidade', 'main.cookies',
+                    'main.aviso_legal', 'main.produto_maquinas_inteligentes', 'main.produto_manual_limpeza']
+# Páginas que incluem _sidebar.html
+SIDEBAR_ENDPOINTS = {'main.sobre'}
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, default=str, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def _templates_fingerprint(app):
+    """Muda quando qualquer template é editado (renderiza tudo de novo)."""
+    stats = []
+    for folder in [app.template_folder] + [bp.template_folder for bp in app.blueprints.values()]:
+        if not folder:
+            continue
+        root = os.path.join(app.root_path, folder)
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for name in filenames:
+                st = os.stat(os.path.join(dirpath, name))
+                stats.append((os.path.relpath(os.path.join(dirpath, name), app.root_path), st.st_mtime_ns, st.st_size))
+    return _digest(sorted(stats))
+
+def fingerprints(app):
+    """Impressões digitais de todas as dependências, lidas com poucas consultas leves."""
+    from routes.solutions import SOLUTIONS_CONFIG
+    per_page = app.config.get('POSTS_PER_PAGE', 10)
+    posts = (db.session.query(Post.id, Post.slug, Post.titulo, Post.excerto, Post.imagem, Post.imagem_lqip,
+                              Post.tempo_leitura, Post.data_criacao, Post.data_atualizacao)
+             .filter(Post.publicado == True).order_by(Post.data_criacao.desc(), Post.id.desc()).all())
+    deps = {
+        'templates': _templates_fingerprint(app),
+        # Cards da home/blog (um a mais para o link "mais antigos")
+        'listing': _digest([tuple(p) for p in posts[:per_page + 1]]),
+        'sidebar': _digest([(p.id, p.slug, p.titulo) for p in posts[:6]]),
+        # script_url é preenchido pela própria view de detalhe
+        'solutions': _digest({slug: {k: v for k, v in config.items() if k != 'script_url'}
+                              for slug, config in SOLUTIONS_CONFIG.items()}),
+    }
+    deps.update((f'post:{p.id}', _digest(tuple(p))) for p in posts)
+
+    related = {}
+    rows = (db.session.query(RelatedPost.post_id, Post.slug, Post.titulo)
+            .join(Post, Post.id == RelatedPost.related_id).filter(Post.publicado == True)
+            .order_by(RelatedPost.post_id, RelatedPost.position))
+    for post_id, slug, titulo in rows:
+        related.setdefault(post_id, []).append((slug, titulo))
+    deps.update((f'related:{post_id}', _digest(items)) for post_id, items in related.items())
+
+    products = db.session.query(*Product.__table__.columns).order_by(Product.id).all()
+    deps.update((f'product:{p.id}', _digest(tuple(p))) for p in products)
+    deps['sitemap'] = _digest([(p.slug, p.data_criacao, p.data_atualizacao) for p in posts]
+                              + [(p.slug, p.created_at) for p in products])
+    return deps, posts, products
+
+def _path(endpoint, **values):
+    return urlsplit(url_for(endpoint, **values)).path
+
+def collect_pages(app, posts, products):
+    """{caminho da URL: [dependências]} de todas as páginas públicas."""
+    from routes.solutions import SOLUTIONS_CONFIG
+    from routes.sitemap import _shards
+    pages = {_path('main.home'): ['templates', 'listing', 'solutions'],
+             _path('blog.blog'): ['templates', 'listing', 'sidebar', 'solutions'],
+             _path('solutions.solutions_index'): ['templates', 'solutions'],
+             _path('sitemap.robots'): ['templates'],
+             _path('sitemap.sitemap'): ['sitemap', 'solutions']}
+    for endpoint in STATIC_ENDPOINTS:
+        pages[_path(endpoint)] = ['templates'] + (['sidebar', 'solutions'] if endpoint in SIDEBAR_ENDPOINTS else [])
+    for slug, config in SOLUTIONS_CONFIG.items():
+        if config['status'] == 'active':
+            pages[_path('solutions.solution_detail', solution_slug=slug)] = ['templates', 'solutions']
+    for p in posts:
+        pages[_path('blog.post_detail', slug=p.slug)] = ['templates', 'sidebar', 'solutions',
+                                                         f'post:{p.id}', f'related:{p.id}']
+    for p in products:
+        pages[_path('main.produto_detalhe', slug=p.slug)] = ['templates', f'product:{p.id}']
+    shards = _shards()
+    if len(shards) > 1:
+        gz = app.config.get('SITEMAP_GZIP', True)
+        for n in range(1, len(shards) + 1):
+            endpoint = 'sitemap.sitemap_shard_gz' if gz else 'sitemap.sitemap_shard'
+            pages[_path(endpoint, n=n)] = ['sitemap', 'solutions']
+    return pages
+
+def output_file(directory, path):
+    """'/blog/x' -> blog/x/index.html; caminhos com extensão (sitemap.xml) ficam como estão."""
+    relative = path.lstrip('/')
+    if not relative or relative.endswith('/') or '.' not in relative.rsplit('/', 1)[-1]:
+        relative = os.path.join(relative, 'index.html')
+    return os.path.join(directory, relative)
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _remove(path, directory):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    # Remove as pastas que ficaram vazias (ex.: blog/<slug>/)
+    folder = os.path.dirname(path)
+    while os.path.abspath(folder) != os.path.abspath(directory):
+        try:
+            os.rmdir(folder)
+        except OSError:
+            break
+        folder = os.path.dirname(folder)
+
+def freeze(app, directory, base_url, workers=4, full=False):
+    """Renderiza as páginas desatualizadas. Retorna (renderizadas, inalteradas, removidas, erros)."""
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = {}
+    previous = {} if full else manifest.get('pages', {})
+
+    with app.test_request_context(base_url=base_url):
+        deps, posts, products = fingerprints(app)
+        pages = collect_pages(app, posts, products)
+        db.session.remove()
+
+    pending = {}
+    for path, keys in pages.items():
+        current = {key: deps.get(key) for key in keys}
+        entry = previous.get(path)
+        if entry is None or entry.get('deps') != current or not os.path.exists(output_file(directory, path)):
+            pending[path] = current
+
+    local = threading.local()
+
+    def render(path):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = app.test_client()
+        # Marcada no environ: as renderizações do freeze não contam visualizações,
+        # sem desligar o contador para as visitas reais atendidas por este processo
+        response = client.get(path, base_url=base_url, environ_overrides={NOT_A_VIEW_ENVIRON_KEY: True})
+        return path, response.status_code, response.get_data()
+
+    results = {path: entry for path, entry in manifest.get('pages', {}).items() if path not in pending}
+    errors = []
+    with ThreadPoolExecutor(workers) as executor:
+        for path, status, body in executor.map(render, pending):
+            if status != 200:
+                errors.append((path, status))
+                continue
+            target = output_file(directory, path)
+            digest = hashlib.sha256(body).hexdigest()
+            # Conteúdo idêntico: mantém o arquivo (e o mtime usado pelas CDNs)
+            if previous.get(path, {}).get('sha256') != digest or not os.path.exists(target):
+                _write(target, body)
+            results[path] = {'deps': pending[path], 'sha256': digest}
+
+    removed = [path for path in results if path not in pages]
+    for path in removed:
+        _remove(output_file(directory, path), directory)
+        del results[path]
+
+    os.makedirs(directory, exist_ok=True)
+    _write(manifest_path, json.dumps({'base_url': base_url, 'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                                      'pages': results}, indent=2, ensure_ascii=False).encode('utf-8'))
+    return len(pending) - len(errors), len(pages) - len(pending), len(removed), errors
+
+class FreezeScheduler:
+    """Com FREEZE_ON_CHANGE, agenda um freeze incremental depois de cada alteração em Post/Product."""
+
+    def __init__(self):
+        self.app = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        self.app = app
+        app.cli.add_command(freeze_command)
+        if app.config.get('FREEZE_ON_CHANGE') and not self._listening:
+            for model in (Post, Product):
+                for event_name in ('after_insert', 'after_update', 'after_delete'):
+                    listen(model, event_name, _mark_dirty)
+            listen(Session, 'after_commit', _after_commit)
+            self._listening = True
+
+    def schedule(self):
+        # Agrupa alterações próximas e dá tempo para o recálculo dos relacionados
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.app.config.get('FREEZE_DELAY', 10), self._run)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self):
+        app = self.app
+        try:
+            with app.app_context():
+                rendered, _unchanged, removed, errors = freeze(
+                    app, app.config['FREEZE_DIR'], app.config['FREEZE_BASE_URL'],
+                    app.config.get('FREEZE_WORKERS', 4))
+                db.session.remove()
+            app.logger.info(f"Freeze incremental: {rendered} página(s) renderizada(s), {removed} removida(s).")
+            for path, status in errors:
+                app.logger.error(f"Freeze: {path} retornou {status}.")
+        except Exception as e:
+            app.logger.error(f"Erro no freeze incremental: {e}")
+
+freeze_scheduler = FreezeScheduler()
+
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['freeze_dirty'] = True
+
+def _after_commit(session):
+    if session.info.pop('freeze_dirty', False):
+        freeze_scheduler.schedule()
+
+@click.command('freeze')
+@click.option('--output', type=click.Path(file_okay=False), help='Pasta de destino (padrão: FREEZE_DIR).')
+@click.option('--base-url', help='URL pública do site, usada nos links absolutos (padrão: FREEZE_BASE_URL).')
+@click.option('--workers', type=int, help='Renderizações em paralelo (padrão: FREEZE_WORKERS).')
+@click.option('--full', is_flag=True, help='Renderiza todas as páginas, ignorando o manifesto.')
+@with_appcontext
+def freeze_command(output, base_url, workers, full):
+    """Gera a versão estática das páginas públicas (incremental)."""
+    app = current_app._get_current_object()
+    start = time.perf_counter()
+    rendered, unchanged, removed, errors = freeze(
+        app, output or app.config['FREEZE_DIR'], base_url or app.config['FREEZE_BASE_URL'],
+        workers or app.config.get('FREEZE_WORKERS', 4), full)
+    click.echo(f"{rendered} página(s) renderizada(s), {unchanged} sem alteração, {removed} removida(s) "
+               f"em {time.perf_counter() - start:.1f}s.")
+    for path, status in errors:
+        click.echo(f"  Erro: {path} retornou {status}", err=True)
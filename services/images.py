@@ -0,0 +1,430 @@
+import base64
+import colorsys
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import quote
+import click
+from flask import current_app, url_for
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import bindparam
+from services.cache import local_cache, content_changed
+
+# Prévia de baixa qualidade (LQIP): largura em px e qualidade do WebP embutido em base64
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+class ImagePipeline:
+    """
+    Gera as variações de cada imagem enviada: larguras fixas em formato original
+    e em WebP, sem metadados (EXIF/GPS), e um arquivo .json ao lado do original
+    com as dimensões de cada variação e a prévia LQIP. O processamento roda em um pool de threads,
+    fora da requisição; os templates usam responsive_img() para emitir srcset/sizes.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.widths = tuple(sorted(app.config.get('IMAGE_WIDTHS', (320, 640, 960, 1280))))
+        self.quality = app.config.get('IMAGE_QUALITY', 82)
+        self.max_workers = app.config.get('IMAGE_WORKERS', 2)
+        app.extensions['image_pipeline'] = self
+        app.add_template_global(responsive_img)
+        app.add_template_global(placeholder_img)
+
+    def submit(self, path, relative_path):
+        """Agenda o processamento de um arquivo salvo (path absoluto, relative_path a partir de static/)."""
+        return self._get_executor().submit(self._process_logged, path, relative_path)
+
+    def _get_executor(self):
+        # Um pool por processo: após o fork do gunicorn as threads do pai não existem
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix='images')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _process_logged(self, path, relative_path):
+        try:
+            return self.process(path, relative_path)
+        except Exception as e:
+            self.app.logger.error(f"Erro ao processar a imagem {relative_path}: {e}")
+
+    def process(self, path, relative_path):
+        """Gera as variações e o manifesto de uma imagem. Retorna o manifesto."""
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            self.app.logger.warning("Pillow não está instalado: variações de imagem desativadas.")
+            return None
+
+        stem, ext = os.path.splitext(path)
+        rel_stem = os.path.splitext(relative_path)[0]
+        ext = ext.lower()
+        fmt = 'PNG' if ext == '.png' else 'JPEG'
+
+        with Image.open(path) as original:
+            manifest = {'width': original.width, 'height': original.height, 'variants': []}
+            if getattr(original, 'is_animated', False):
+                # GIFs animados são servidos como estão; a prévia vem do primeiro quadro
+                manifest['lqip'] = _lqip_from_image(original)
+                self._write_manifest(stem, manifest)
+                self._fill_previews(relative_path, manifest)
+                return manifest
+
+            # Para JPEG, decodifica já em escala reduzida quando possível
+            original.draft('RGB', (self.widths[-1], self.widths[-1]))
+            image = ImageOps.exif_transpose(original)
+            if fmt == 'JPEG' and image.mode != 'RGB':
+                image = image.convert('RGB')
+            manifest['lqip'] = _lqip_from_image(image)
+
+            # Larguras configuradas menores que a imagem, mais a própria largura se não passar do máximo
+            widths = [w for w in self.widths if w < image.width]
+            if image.width <= self.widths[-1]:
+                widths.append(image.width)
+            for width in widths:
+                height = round(image.height * width / image.width)
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                out_ext = '.jpg' if fmt == 'JPEG' else '.png'
+                # Nada de exif/icc extras: os metadados do original não são copiados
+                resized.save(f"{stem}-{width}{out_ext}", fmt, quality=self.quality, optimize=True)
+                resized.save(f"{stem}-{width}.webp", 'WEBP', quality=self.quality, method=4)
+                manifest['variants'].append({
+                    'width': width, 'height': height,
+                    'path': f"{rel_stem}-{width}{out_ext}",
+                    'webp': f"{rel_stem}-{width}.webp",
+                })
+            largest = manifest['variants'][-1]
+            manifest['width'], manifest['height'] = largest['width'], largest['height']
+
+        self._write_manifest(stem, manifest)
+        self._fill_previews(relative_path, manifest)
+        return manifest
+
+    def _write_manifest(self, stem, manifest):
+        tmp = f"{stem}.json.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, f"{stem}.json")
+
+    def _fill_previews(self, relative_path, manifest):
+        """
+        Grava a prévia LQIP nos posts que usam a imagem e ainda não a têm.
+
+        O post costuma ser salvo antes de o processamento terminar; se terminar antes,
+        o próprio save lê a prévia do manifesto (manifest_lqip).
+        """
+        # O "manifesto inexistente" pode estar em cache neste processo
+        local_cache.delete(_manifest_key(relative_path))
+        if not manifest.get('lqip'):
+            return
+        from extensions import db
+        from models import Post
+        table = Post.__table__
+        # UPDATE direto: não altera data_atualizacao
+        stmt = (table.update().where(table.c.imagem == relative_path, table.c.imagem_lqip.is_(None))
+                .values(imagem_lqip=manifest['lqip'], data_atualizacao=table.c.data_atualizacao))
+        with self.app.app_context():
+            with db.engine.begin() as conn:
+                updated = conn.execute(stmt).rowcount
+            if updated:
+                content_changed()
+
+image_pipeline = ImagePipeline()
+
+# Marca de "manifesto inexistente" no cache (None é o valor de cache vazio)
+_NO_MANIFEST = object()
+
+def _manifest_key(relative_path):
+    return f'images:manifest:{relative_path}'
+
+def image_manifest(relative_path):
+    """Lê (com cache) o manifesto de variações de uma imagem, ou None se ainda não existe."""
+    def load():
+        stem = os.path.splitext(os.path.join(current_app.static_folder, relative_path))[0]
+        try:
+            with open(f"{stem}.json") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    key = _manifest_key(relative_path)
+    manifest = local_cache.get(key)
+    if manifest is None:
+        manifest = load()
+        # Sem manifesto (processamento em andamento ou imagem sem variações): a ausência
+        # também fica em cache, por pouco tempo, para não consultar o disco a cada render
+        local_cache.set(key, _NO_MANIFEST if manifest is None else manifest, 3600 if manifest else 30)
+    return None if manifest is _NO_MANIFEST else manifest
+
+def _lqip_from_image(image):
+    from PIL import Image
+    height = max(1, round(image.height * LQIP_WIDTH / image.width))
+    thumb = image.convert('RGB').resize((LQIP_WIDTH, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    thumb.save(buffer, 'WEBP', quality=LQIP_QUALITY, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+def manifest_lqip(relative_path):
+    """Prévia LQIP já calculada pelo pipeline (lida do manifesto), ou None. Não abre a imagem."""
+    manifest = image_manifest(relative_path)
+    return manifest.get('lqip') if manifest else None
+
+def lqip_for(relative_path):
+    """
+    Prévia LQIP (data URI de algumas centenas de bytes) de uma imagem em static/.
+
+    Usa a do manifesto se o pipeline já processou a imagem; senão calcula a partir
+    do original, decodificado já em escala reduzida. None se não for possível.
+    Decodifica a imagem: usar fora de requisições (comando images-lqip).
+    """
+    lqip = manifest_lqip(relative_path)
+    if lqip:
+        return lqip
+    try:
+        from PIL import Image, ImageOps
+        with Image.open(os.path.join(current_app.static_folder, relative_path)) as original:
+            original.draft('RGB', (LQIP_WIDTH * 8, LQIP_WIDTH * 8))
+            return _lqip_from_image(ImageOps.exif_transpose(original))
+    except Exception as e:
+        current_app.logger.warning(f"Prévia LQIP indisponível para {relative_path}: {e}")
+        return None
+
+# Metadados removidos dos originais enviados: EXIF (inclui GPS), XMP, IPTC e textos.
+# JPEG: APP1 (EXIF/XMP), APP13 (IPTC/Photoshop) e comentários
+JPEG_METADATA_MARKERS = {0xE1, 0xED, 0xFE}
+PNG_METADATA_CHUNKS = {b'eXIf', b'tEXt', b'iTXt', b'zTXt', b'tIME'}
+WEBP_METADATA_CHUNKS = {b'EXIF', b'XMP '}
+EXIF_ORIENTATION = 0x0112
+
+def strip_metadata(path):
+    """
+    Remove os metadados de uma imagem JPEG, PNG ou WebP, sem recodificá-la.
+
+    Os dados da imagem são copiados como estão (sem perda e sem decodificar); em JPEG
+    só a orientação do EXIF é mantida, para a foto não aparecer girada. Outros formatos
+    ficam como estão. Retorna True se o arquivo foi reescrito; ValueError se o
+    arquivo não for uma imagem válida do formato.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[:2] == b'\xff\xd8':
+        strip = _strip_jpeg
+    elif head[:8] == b'\x89PNG\r\n\x1a\n':
+        strip = _strip_png
+    elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        strip = _strip_webp
+    else:
+        return False
+    tmp = f"{path}.strip"
+    try:
+        with open(path, 'rb') as src, open(tmp, 'wb') as dst:
+            strip(src, dst)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return True
+
+def _read(src, size):
+    data = src.read(size)
+    if len(data) != size:
+        raise ValueError('arquivo de imagem truncado')
+    return data
+
+def _copy(src, dst, size):
+    while size:
+        chunk = _read(src, min(size, 64 * 1024))
+        dst.write(chunk)
+        size -= len(chunk)
+
+def _strip_jpeg(src, dst):
+    dst.write(_read(src, 2))
+    while True:
+        marker = _read(src, 2)
+        while marker == b'\xff\xff':
+            # Bytes de preenchimento antes do marcador
+            marker = b'\xff' + _read(src, 1)
+        if marker[0] != 0xFF:
+            raise ValueError('marcador JPEG inválido')
+        if marker[1] in (0xDA, 0xD9):
+            # Início dos dados da imagem (SOS) ou fim: o resto é copiado como está
+            dst.write(marker)
+            shutil.copyfileobj(src, dst)
+            return
+        if 0xD0 <= marker[1] <= 0xD7 or marker[1] == 0x01:
+            dst.write(marker)
+            continue
+        length = _read(src, 2)
+        segment = _read(src, struct.unpack('>H', length)[0] - 2)
+        if marker[1] not in JPEG_METADATA_MARKERS:
+            dst.write(marker + length + segment)
+        elif marker[1] == 0xE1 and segment.startswith(b'Exif\x00\x00'):
+            orientation = _exif_orientation(segment[6:])
+            if orientation not in (None, 1):
+                dst.write(_orientation_segment(orientation))
+
+def _exif_orientation(tiff):
+    """Lê a orientação do IFD0 de um bloco EXIF (TIFF), ou None."""
+    try:
+        endian = {b'II': '<', b'MM': '>'}[tiff[:2]]
+        offset = struct.unpack(endian + 'I', tiff[4:8])[0]
+        count = struct.unpack(endian + 'H', tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+            if struct.unpack(endian + 'H', entry[:2])[0] == EXIF_ORIENTATION:
+                return struct.unpack(endian + 'H', entry[8:10])[0]
+    except (KeyError, struct.error):
+        pass
+    return None
+
+def _orientation_segment(orientation):
+    """Segmento APP1 com um EXIF mínimo: apenas a orientação."""
+    tiff = (b'MM\x00*' + struct.pack('>I', 8) + struct.pack('>H', 1)
+            + struct.pack('>HHIHH', EXIF_ORIENTATION, 3, 1, orientation, 0) + struct.pack('>I', 0))
+    payload = b'Exif\x00\x00' + tiff
+    return b'\xff\xe1' + struct.pack('>H', len(payload) + 2) + payload
+
+def _strip_png(src, dst):
+    dst.write(_read(src, 8))
+    while True:
+        header = _read(src, 8)
+        length, kind = struct.unpack('>I', header[:4])[0], header[4:]
+        if kind in PNG_METADATA_CHUNKS:
+            _read(src, length + 4)
+            continue
+        dst.write(header)
+        _copy(src, dst, length + 4)
+        if kind == b'IEND':
+            return
+
+def _strip_webp(src, dst):
+    _read(src, 12)
+    dst.write(b'RIFF\x00\x00\x00\x00WEBP')
+    size = 4
+    while True:
+        header = src.read(8)
+        if not header:
+            break
+        if len(header) != 8:
+            raise ValueError('arquivo de imagem truncado')
+        kind, length = header[:4], struct.unpack('<I', header[4:])[0]
+        padded = length + (length & 1)
+        if kind in WEBP_METADATA_CHUNKS:
+            _read(src, padded)
+            continue
+        dst.write(header)
+        if kind == b'VP8X':
+            # Desliga as flags de EXIF (0x08) e XMP (0x04) do cabeçalho estendido
+            payload = bytearray(_read(src, padded))
+            payload[0] &= ~0x0C
+            dst.write(payload)
+        else:
+            _copy(src, dst, padded)
+        size += 8 + padded
+    dst.seek(4)
+    dst.write(struct.pack('<I', size))
+
+@lru_cache(maxsize=1024)
+def placeholder_data_uri(seed, width, height):
+    """SVG determinístico (gradiente com cores derivadas da semente) como data URI."""
+    digest = hashlib.sha1(str(seed).encode('utf-8')).digest()
+    hue = digest[0] / 255
+    colors = []
+    for shift, lightness in ((0, 0.62), (0.08 + digest[1] / 255 * 0.17, 0.42)):
+        r, g, b = colorsys.hls_to_rgb((hue + shift) % 1, lightness, 0.45)
+        colors.append(f'#{round(r * 255):02x}{round(g * 255):02x}{round(b * 255):02x}')
+    angle = digest[2] % 180
+    cx, cy, radius = digest[3] % width, digest[4] % height, min(width, height) * (0.25 + digest[5] / 255 * 0.35)
+    svg = (
+        f"<svg xmlns='http://www.w3.org/2000/svg' width='{width}' height='{height}' viewBox='0 0 {width} {height}' "
+        f"preserveAspectRatio='xMidYMid slice'>"
+        f"<defs><linearGradient id='g' gradientTransform='rotate({angle} .5 .5)'>"
+        f"<stop offset='0' stop-color='{colors[0]}'/><stop offset='1' stop-color='{colors[1]}'/>"
+        f"</linearGradient></defs>"
+        f"<rect width='100%' height='100%' fill='url(#g)'/>"
+        f"<circle cx='{cx}' cy='{cy}' r='{radius:.0f}' fill='#fff' fill-opacity='.12'/>"
+        f"</svg>"
+    )
+    return 'data:image/svg+xml,' + quote(svg, safe=" /:=.,()'")
+
+def placeholder_img(seed, width, height, alt='', class_='', style=''):
+    """<img> com a imagem padrão gerada localmente (sem requisição extra: vai embutida no HTML)."""
+    attrs = f'alt="{escape(alt)}"'
+    if class_:
+        attrs += f' class="{escape(class_)}"'
+    if style:
+        attrs += f' style="{escape(style)}"'
+    return Markup(f'<img src="{placeholder_data_uri(str(seed), width, height)}" '
+                  f'width="{width}" height="{height}" {attrs}>')
+
+def responsive_img(path, alt='', sizes='100vw', class_='', style='', loading='lazy', placeholder=None):
+    """
+    Emite <picture> com srcset WebP/original, sizes e width/height a partir do manifesto.
+
+    placeholder: prévia LQIP (data URI) exibida como fundo até a imagem carregar.
+    """
+    if placeholder:
+        style = f"{style.rstrip(';')}; background: url('{placeholder}') center / cover no-repeat".lstrip('; ')
+    attrs = f'alt="{escape(alt)}"'
+    if class_:
+        attrs += f' class="{escape(class_)}"'
+    if style:
+        attrs += f' style="{escape(style)}"'
+    if loading:
+        attrs += f' loading="{escape(loading)}" decoding="async"'
+
+    manifest = image_manifest(path) if path else None
+    if not manifest or not manifest['variants']:
+        return Markup(f'<img src="{url_for("static", filename=path)}" {attrs}>')
+
+    variants = manifest['variants']
+    srcset = ', '.join(f'{url_for("static", filename=v["path"])} {v["width"]}w' for v in variants)
+    webp_srcset = ', '.join(f'{url_for("static", filename=v["webp"])} {v["width"]}w' for v in variants)
+    largest = variants[-1]
+    return Markup(
+        f'<picture>'
+        f'<source type="image/webp" srcset="{webp_srcset}" sizes="{escape(sizes)}">'
+        f'<img src="{url_for("static", filename=largest["path"])}" srcset="{srcset}" sizes="{escape(sizes)}" '
+        f'width="{manifest["width"]}" height="{manifest["height"]}" {attrs}>'
+        f'</picture>'
+    )
+
+@click.command('images-lqip')
+@click.option('--all', 'recompute_all', is_flag=True, help='Recalcula também os posts que já têm prévia.')
+@with_appcontext
+def images_lqip_command(recompute_all):
+    """Calcula a prévia LQIP das imagens de destaque dos posts existentes."""
+    from extensions import db
+    from models import Post
+    table = Post.__table__
+    query = db.session.query(Post.id, Post.imagem).filter(Post.imagem.isnot(None), Post.imagem != '')
+    if not recompute_all:
+        query = query.filter(Post.imagem_lqip.is_(None))
+    rows = query.order_by(Post.id).all()
+    # Várias publicações podem usar o mesmo arquivo (uploads são nomeados pelo hash)
+    previews = {imagem: lqip_for(imagem) for imagem in {row.imagem for row in rows}}
+    updates = [{'post_id': row.id, 'lqip': previews[row.imagem]} for row in rows if previews[row.imagem]]
+    if updates:
+        # UPDATE direto: não altera data_atualizacao
+        stmt = (table.update().where(table.c.id == bindparam('post_id'))
+                .values(imagem_lqip=bindparam('lqip'), data_atualizacao=table.c.data_atualizacao))
+        with db.engine.begin() as conn:
+            conn.execute(stmt, updates)
+        content_changed()
+    click.echo(f"{len(updates)} post(s) atualizado(s), {len(rows) - len(updates)} sem prévia.")
@@ -0,0 +1,133 @@
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, request, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+class RequestStats:
+    """Medições de uma requisição amostrada."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+        self.template_time = 0.0
+        self.template_starts = []
+        self.timers = {}
+
+class Instrumentation:
+    """
+    Medição de desempenho por requisição: consultas SQL (quantidade e tempo),
+    renderização de templates e trechos marcados com timer().
+
+    - Consultas e requisições acima dos limites são sempre registradas no log
+      (custa apenas duas leituras de relógio por consulta).
+    - A contagem detalhada, a detecção de N+1 (o mesmo SQL repetido muitas vezes
+      na mesma requisição) e o cabeçalho Server-Timing valem só para as
+      requisições amostradas (INSTRUMENTATION_SAMPLE_RATE).
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('INSTRUMENTATION_ENABLED', True)
+        self.sample_rate = app.config.get('INSTRUMENTATION_SAMPLE_RATE', 0.1)
+        self.server_timing = app.config.get('SERVER_TIMING', False)
+        self.slow_request = app.config.get('SLOW_REQUEST_MS', 1000) / 1000
+        self.slow_query = app.config.get('SLOW_QUERY_MS', 200) / 1000
+        self.n_plus_one = app.config.get('N_PLUS_ONE_THRESHOLD', 10)
+        app.extensions['instrumentation'] = self
+        if not self.enabled:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    # --- Requisição ---
+    def _start_request(self):
+        g._perf_start = time.perf_counter()
+        g._perf = RequestStats() if random.random() < self.sample_rate else None
+
+    def _finish_request(self, response):
+        start = g.pop('_perf_start', None)
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        stats = g.pop('_perf', None)
+        if stats is not None:
+            self._check_n_plus_one(stats)
+            if self.server_timing:
+                response.headers['Server-Timing'] = self._server_timing(stats, total)
+        if total >= self.slow_request:
+            details = f", {stats.queries} consulta(s) em {stats.db_time * 1000:.1f} ms" if stats else ''
+            self.app.logger.warning(f"Requisição lenta: {request.method} {request.path} "
+                                    f"{total * 1000:.1f} ms (status {response.status_code}{details})")
+        return response
+
+    def _check_n_plus_one(self, stats):
+        for statement, count in stats.statements.most_common(3):
+            if count < self.n_plus_one:
+                break
+            self.app.logger.warning(f"Possível N+1 em {request.method} {request.path}: "
+                                    f"{count}x {' '.join(statement.split())[:500]}")
+
+    @staticmethod
+    def _server_timing(stats, total):
+        metrics = [f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+                   f'tpl;dur={stats.template_time * 1000:.1f}']
+        metrics.extend(f'{name};dur={duration * 1000:.1f}' for name, duration in stats.timers.items())
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    # --- Templates (apenas o template principal de render_template) ---
+    def _before_render(self, sender, template, context, **extra):
+        stats = g.get('_perf')
+        if stats is not None:
+            stats.template_starts.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        stats = g.get('_perf')
+        if stats is not None and stats.template_starts:
+            stats.template_time += time.perf_counter() - stats.template_starts.pop()
+
+    @contextmanager
+    def timer(self, name):
+        """Mede um trecho da view e o inclui no Server-Timing (ex.: with instrumentation.timer('mail'))."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats = g.get('_perf') if has_request_context() else None
+            if stats is not None:
+                stats.timers[name] = stats.timers.get(name, 0.0) + time.perf_counter() - start
+
+instrumentation = Instrumentation()
+
+# --- Eventos do SQLAlchemy (valem para todos os engines) ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    if has_request_context():
+        stats = g.get('_perf')
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+    if instrumentation.app is not None and elapsed >= instrumentation.slow_query:
+        instrumentation.app.logger.warning(f"Consulta lenta ({elapsed * 1000:.1f} ms): "
+                                           f"{' '.join(statement.split())[:1000]}")
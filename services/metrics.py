@@ -0,0 +1,144 @@
+"""
+Métricas no formato de exposição do Prometheus, em GET /metrics.
+
+Usa o modo multiprocesso do prometheus_client: cada worker do gunicorn grava
+seus valores em arquivos mmap no diretório METRICS_MULTIPROC_DIR (ou na variável
+PROMETHEUS_MULTIPROC_DIR), e /metrics agrega todos os processos. O diretório
+deve ser esvaziado quando o servidor inicia (on_starting) e os processos
+encerrados marcados com child_exit(), ambos chamados pela configuração do gunicorn.
+
+O acesso exige o cabeçalho 'Authorization: Bearer <METRICS_TOKEN>' ou um
+usuário autenticado. Sem o prometheus_client instalado, tudo vira no-op.
+"""
+import glob
+import os
+import time
+from flask import g, request, Response, abort
+from flask_login import current_user
+
+# Faixas dos histogramas (segundos)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+POOL_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+class Metrics:
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.token = app.config.get('METRICS_TOKEN')
+        app.extensions['metrics'] = self
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR') or app.config.get('METRICS_MULTIPROC_DIR') \
+            or os.path.join(app.instance_path, 'prometheus')
+        os.makedirs(directory, exist_ok=True)
+        # Precisa estar definido antes do primeiro import do prometheus_client
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = directory
+        try:
+            from prometheus_client import Counter, Gauge, Histogram
+        except ImportError:
+            app.logger.warning("prometheus_client não está instalado: métricas desativadas.")
+            return
+        if not self.enabled:
+            self.requests = Counter('http_requests_total', 'Requisições por endpoint, método e status',
+                                    ['endpoint', 'method', 'status'])
+            self.latency = Histogram('http_request_duration_seconds', 'Duração das requisições por endpoint',
+                                     ['endpoint'], buckets=LATENCY_BUCKETS)
+            self.in_flight = Gauge('http_requests_in_progress', 'Requisições em andamento',
+                                   multiprocess_mode='livesum')
+            self.cache_requests = Counter('cache_requests_total', 'Consultas aos caches de páginas e de trechos',
+                                          ['cache', 'result'])
+            self.pool_wait = Histogram('db_pool_checkout_seconds', 'Espera para obter uma conexão do pool',
+                                       buckets=POOL_BUCKETS)
+            self.mail_latency = Histogram('mail_send_duration_seconds', 'Duração do envio de cada e-mail',
+                                          ['result'], buckets=LATENCY_BUCKETS)
+            self.enabled = True
+        app.before_request(self._start_request)
+        app.after_request(self._record_status)
+        app.teardown_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    # --- Requisições ---
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+        self.in_flight.inc()
+        self._instrument_pool()
+
+    def _record_status(self, response):
+        g._metrics_status = response.status_code
+        return response
+
+    def _finish_request(self, exc):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return
+        self.in_flight.dec()
+        endpoint = request.endpoint or '<unmatched>'
+        status = g.pop('_metrics_status', 500)
+        self.latency.labels(endpoint).observe(time.perf_counter() - start)
+        self.requests.labels(endpoint, request.method, str(status)).inc()
+
+    def _instrument_pool(self):
+        # O pool é recriado por engine.dispose() (ex.: após o fork), então a
+        # verificação é feita a cada requisição; o custo é um getattr.
+        from extensions import db
+        pool = db.engine.pool
+        if getattr(pool, '_metrics_instrumented', False):
+            return
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                self.pool_wait.observe(time.perf_counter() - start)
+
+        pool.connect = timed_connect
+        pool._metrics_instrumented = True
+
+    # --- Pontos de medição usados por outros serviços ---
+    def cache_event(self, cache, hit):
+        if self.enabled:
+            self.cache_requests.labels(cache, 'hit' if hit else 'miss').inc()
+
+    def mail_sent(self, duration, ok):
+        if self.enabled:
+            self.mail_latency.labels('ok' if ok else 'erro').observe(duration)
+
+    # --- Exposição ---
+    def _authorized(self):
+        if self.token and request.headers.get('Authorization') == f'Bearer {self.token}':
+            return True
+        return current_user.is_authenticated
+
+    def view(self):
+        if not self._authorized():
+            abort(403)
+        from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST,
+                        headers={'Cache-Control': 'no-store'})
+
+metrics = Metrics()
+
+def on_starting(directory=None):
+    """Hook do gunicorn: remove os arquivos de métricas de execuções anteriores."""
+    directory = directory or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory and os.path.isdir(directory):
+        for path in glob.glob(os.path.join(directory, '*.db')):
+            os.remove(path)
+
+def child_exit(worker):
+    """Hook do gunicorn: descarta os gauges 'live' de um worker encerrado."""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
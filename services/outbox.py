@@ -0,0 +1,166 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from flask_mail import Message
+from sqlalchemy import or_, and_
+from extensions import db, mail
+from models import OutboxMessage
+from services.metrics import metrics
+
+class MailOutbox:
+    """
+    Fila persistente de e-mails.
+
+    A requisição apenas grava a mensagem na tabela mail_outbox e retorna. A entrega
+    é feita por um worker (thread em cada processo, ou 'flask outbox-worker' como
+    processo separado) que reaproveita uma única conexão SMTP para todo o lote,
+    tenta de novo com espera exponencial e registra o estado de cada mensagem.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.batch_size = app.config.get('MAIL_OUTBOX_BATCH_SIZE', 20)
+        self.max_attempts = app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self.retry_base = app.config.get('MAIL_OUTBOX_RETRY_BASE', 60)
+        self.poll_interval = app.config.get('MAIL_OUTBOX_POLL_INTERVAL', 30)
+        # Mensagens 'enviando' há mais tempo que isso vieram de um worker que caiu
+        self.claim_timeout = app.config.get('MAIL_OUTBOX_CLAIM_TIMEOUT', 600)
+        self.use_thread = app.config.get('MAIL_OUTBOX_WORKER', 'thread') == 'thread'
+        app.extensions['mail_outbox'] = self
+        app.cli.add_command(outbox_worker_command)
+        app.cli.add_command(outbox_flush_command)
+        if self.use_thread:
+            app.before_request(self._ensure_thread)
+
+    def enqueue(self, subject, recipients, body, sender=None, reply_to=None):
+        """Grava a mensagem na fila (com commit) e acorda o worker."""
+        message = OutboxMessage(subject=subject, sender=sender, recipients=','.join(recipients),
+                                body=body, reply_to=reply_to)
+        db.session.add(message)
+        db.session.commit()
+        if self.use_thread:
+            self._ensure_thread()
+            self._wakeup.set()
+        return message
+
+    # --- Entrega ---
+    def _claim(self, now):
+        """Reserva atomicamente um lote de mensagens vencidas para este worker."""
+        stale = now - timedelta(seconds=self.claim_timeout)
+        due = or_(and_(OutboxMessage.status == 'pendente', OutboxMessage.next_attempt_at <= now),
+                  and_(OutboxMessage.status == 'enviando', OutboxMessage.next_attempt_at <= stale))
+        candidates = (db.session.query(OutboxMessage.id, OutboxMessage.status).filter(due)
+                      .order_by(OutboxMessage.next_attempt_at).limit(self.batch_size).all())
+        claimed = []
+        for message_id, status in candidates:
+            # O UPDATE condicional garante que dois workers não peguem a mesma mensagem
+            updated = (OutboxMessage.query.filter_by(id=message_id, status=status)
+                       .update({'status': 'enviando', 'next_attempt_at': now}, synchronize_session=False))
+            if updated:
+                claimed.append(message_id)
+        db.session.commit()
+        if not claimed:
+            return []
+        return OutboxMessage.query.filter(OutboxMessage.id.in_(claimed)).all()
+
+    def _failed(self, message, error, now):
+        message.attempts += 1
+        message.last_error = str(error)
+        if message.attempts >= self.max_attempts:
+            message.status = 'falhou'
+        else:
+            message.status = 'pendente'
+            message.next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (message.attempts - 1))
+
+    def process_batch(self):
+        """Entrega um lote de mensagens. Retorna o número de mensagens enviadas."""
+        now = datetime.utcnow()
+        messages = self._claim(now)
+        if not messages:
+            return 0
+
+        sent = 0
+        try:
+            # Uma única conexão SMTP (connect/TLS/login) para o lote inteiro
+            with mail.connect() as conn:
+                for message in messages:
+                    start = time.perf_counter()
+                    try:
+                        conn.send(Message(message.subject, sender=message.sender,
+                                          recipients=message.recipients.split(','),
+                                          body=message.body, reply_to=message.reply_to))
+                    except Exception as e:
+                        metrics.mail_sent(time.perf_counter() - start, ok=False)
+                        self._failed(message, e, now)
+                    else:
+                        metrics.mail_sent(time.perf_counter() - start, ok=True)
+                        message.status = 'enviado'
+                        message.attempts += 1
+                        message.sent_at = datetime.utcnow()
+                        message.last_error = None
+                        sent += 1
+        except Exception as e:
+            # Falha ao conectar/autenticar: todo o lote volta para a fila
+            for message in messages:
+                if message.status == 'enviando':
+                    self._failed(message, e, now)
+            self.app.logger.error(f"Erro ao conectar ao servidor SMTP: {e}")
+        db.session.commit()
+        return sent
+
+    def run_forever(self):
+        """Laço do worker: processa lotes até a fila esvaziar e espera novas mensagens."""
+        while True:
+            try:
+                with self.app.app_context():
+                    while self.process_batch():
+                        pass
+                    db.session.remove()
+            except Exception as e:
+                self.app.logger.error(f"Erro no worker de e-mails: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _ensure_thread(self):
+        """Inicia (uma vez por processo, inclusive após fork) a thread de entrega."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            self._thread = threading.Thread(target=self.run_forever, name='mail-outbox', daemon=True)
+            self._thread.start()
+
+outbox = MailOutbox()
+
+@click.command('outbox-worker')
+def outbox_worker_command():
+    """Executa o worker de e-mails em primeiro plano (use com MAIL_OUTBOX_WORKER=external)."""
+    click.echo("Worker de e-mails iniciado.")
+    outbox.run_forever()
+
+@click.command('outbox-flush')
+@with_appcontext
+def outbox_flush_command():
+    """Tenta entregar agora todas as mensagens vencidas da fila."""
+    total = 0
+    while True:
+        sent = outbox.process_batch()
+        if not sent:
+            break
+        total += sent
+    click.echo(f"{total} mensagem(ns) enviada(s).")
@@ -0,0 +1,60 @@
+"""
+Campos derivados dos posts, calculados ao salvar (e não a cada renderização).
+
+- texto_plano: texto legível do conteúdo (busca, relacionados, meta descriptions)
+- excerto: o resumo ou, se vazio, um trecho automático do texto
+- palavras / tempo_leitura: contagem de palavras e minutos estimados de leitura
+- conteudo_renderizado: HTML sanitizado exibido na página do post
+"""
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam
+from extensions import db
+from services.text import html_to_text, sanitize_html, excerpt
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 160
+
+def derive_fields(conteudo, resumo):
+    texto = html_to_text(conteudo)
+    palavras = len(texto.split())
+    return {
+        'texto_plano': texto,
+        'excerto': (resumo or '').strip() or excerpt(texto, EXCERPT_LENGTH),
+        'palavras': palavras,
+        'tempo_leitura': max(1, round(palavras / WORDS_PER_MINUTE)),
+        'conteudo_renderizado': sanitize_html(conteudo),
+    }
+
+def apply_derived_fields(post):
+    for key, value in derive_fields(post.conteudo, post.resumo).items():
+        setattr(post, key, value)
+
+@click.command('posts-backfill')
+@click.option('--batch-size', default=200, show_default=True, help='Posts processados por transação.')
+@click.option('--all', 'recompute_all', is_flag=True, help='Recalcula também os posts já preenchidos.')
+@with_appcontext
+def posts_backfill_command(batch_size, recompute_all):
+    """Preenche os campos derivados dos posts existentes."""
+    from models import Post
+    table = Post.__table__
+    # UPDATE direto: não altera data_atualizacao nem dispara os listeners do ORM
+    stmt = (table.update().where(table.c.id == bindparam('post_id'))
+            .values(data_atualizacao=table.c.data_atualizacao,
+                    **{key: bindparam(key) for key in derive_fields('', '')}))
+    total = 0
+    last_id = 0
+    while True:
+        query = db.session.query(Post.id, Post.conteudo, Post.resumo).filter(Post.id > last_id)
+        if not recompute_all:
+            query = query.filter(Post.texto_plano.is_(None))
+        rows = query.order_by(Post.id).limit(batch_size).all()
+        if not rows:
+            break
+        with db.engine.begin() as conn:
+            conn.execute(stmt, [dict(derive_fields(conteudo, resumo), post_id=post_id)
+                                for post_id, conteudo, resumo in rows])
+        total += len(rows)
+        last_id = rows[-1].id
+        db.session.expunge_all()
+    click.echo(f"{total} post(s) atualizado(s).")
@@ -0,0 +1,293 @@
+"""
+Posts relacionados por similaridade de cosseno entre vetores TF-IDF.
+
+Os vizinhos mais próximos de cada post ficam na tabela related_posts, e a página
+do post os lê com uma única consulta indexada. Ao salvar um post, apenas ele e os
+posts mais parecidos com ele são recalculados (em segundo plano), e só o texto
+dos posts alterados é tokenizado de novo (os vetores ficam em memória); o comando
+'flask related-rebuild' recalcula tudo com multiplicações de matrizes esparsas
+em blocos, o que continua rápido com dezenas de milhares de posts.
+"""
+import math
+import os
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, insert, select
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session, object_session
+from extensions import db
+from models import Post, RelatedPost
+from services.cache import content_changed
+from services.text import normalize
+
+WORD_RE = re.compile(r'[a-z]{3,}')
+STOPWORDS = set('''
+    para com sem por que uma uns umas dos das nos nas pelo pela pelos pelas como mais mas
+    isso este esta esse essa aquele aquela seu sua seus suas ele ela eles elas nao sim sao
+    ser ter tem foi era sobre entre quando onde muito muita tambem apenas ainda ate cada
+    qual quais quem pode podem deve devem fazer feito assim ao aos the and
+'''.split())
+# Quantos vizinhos de um post alterado também são recalculados
+NEIGHBOURS_TO_REFRESH = 50
+
+def tokenize(text):
+    return [w for w in WORD_RE.findall(normalize(text)) if w not in STOPWORDS]
+
+def _document(titulo, resumo, texto_plano):
+    # O título pesa mais que o corpo
+    return f"{titulo} {titulo} {resumo or ''} {texto_plano or ''}"
+
+def _tfidf(vectors, n_terms):
+    """
+    Matriz TF-IDF esparsa (CSR, float32) a partir dos vetores tf (índices, pesos)
+    de cada documento, com linhas normalizadas (norma L2): o produto X @ X.T já é
+    a similaridade de cosseno.
+    """
+    import numpy as np
+    from scipy.sparse import csr_matrix
+
+    n = len(vectors)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum([len(indices) for indices, _ in vectors], out=indptr[1:])
+    indices = np.concatenate([v[0] for v in vectors]) if n else np.zeros(0, dtype=np.int32)
+    data = np.concatenate([v[1] for v in vectors]) if n else np.zeros(0, dtype=np.float32)
+    matrix = csr_matrix((data, indices, indptr), shape=(n, max(n_terms, 1)))
+    df = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return csr_matrix(matrix.multiply(1 / norms[:, None]), dtype=np.float32)
+
+class Corpus:
+    """
+    Vetores tf dos posts publicados, guardados entre as atualizações incrementais.
+
+    A cada atualização só as datas dos posts são lidas; o texto é relido e
+    tokenizado apenas para os posts novos, alterados ou indicados explicitamente.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.stamps = {}   # post_id -> (data_criacao, data_atualizacao)
+        self.vectors = {}  # post_id -> (índices dos termos, pesos tf)
+
+    def vectorize(self, document):
+        import numpy as np
+        counts = Counter(tokenize(document))
+        indices = np.fromiter((self.vocabulary.setdefault(term, len(self.vocabulary)) for term in counts),
+                              dtype=np.int32, count=len(counts))
+        weights = np.fromiter((1.0 + math.log(c) for c in counts.values()), dtype=np.float32, count=len(counts))  # tf sublinear
+        return indices, weights
+
+    def refresh(self, changed=()):
+        """Sincroniza com o banco e retorna os ids dos posts publicados, em ordem."""
+        stamps = {post_id: (criacao, atualizacao) for post_id, criacao, atualizacao in
+                  db.session.query(Post.id, Post.data_criacao, Post.data_atualizacao)
+                  .filter(Post.publicado == True)}
+        changed = set(changed)
+        for post_id in set(self.vectors) - set(stamps):
+            del self.vectors[post_id]
+        stale = sorted(post_id for post_id, stamp in stamps.items()
+                       if post_id in changed or post_id not in self.vectors or self.stamps.get(post_id) != stamp)
+        for start in range(0, len(stale), 500):
+            rows = (db.session.query(Post.id, Post.titulo, Post.resumo, Post.texto_plano)
+                    .filter(Post.id.in_(stale[start:start + 500])))
+            for post_id, titulo, resumo, texto_plano in rows:
+                self.vectors[post_id] = self.vectorize(_document(titulo, resumo, texto_plano))
+        self.stamps = stamps
+        return sorted(post_id for post_id in stamps if post_id in self.vectors)
+
+    def matrix(self, ids):
+        return _tfidf([self.vectors[post_id] for post_id in ids], len(self.vocabulary))
+
+def build_matrix(documents):
+    """Matriz TF-IDF normalizada de uma lista de textos."""
+    corpus = Corpus()
+    return _tfidf([corpus.vectorize(document) for document in documents], len(corpus.vocabulary))
+
+def top_k(matrix, rows, k):
+    """
+    Para cada linha em rows, retorna [(coluna, similaridade)] dos k mais similares.
+
+    Processa em blocos para limitar a memória da matriz densa de similaridades.
+    """
+    import numpy as np
+
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return {row: [] for row in rows}
+    chunk = max(1, int(16_000_000 // max(n, 1)))  # ~64 MB em float32 por bloco
+    transposed = matrix.T.tocsc()
+    result = {}
+    for start in range(0, len(rows), chunk):
+        block = rows[start:start + chunk]
+        sims = (matrix[block] @ transposed).toarray()
+        sims[np.arange(len(block)), block] = -1.0  # ignora o próprio post
+        best = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        for r, row in enumerate(block):
+            cols = best[r][np.argsort(-sims[r, best[r]])]
+            result[row] = [(int(c), float(sims[r, c])) for c in cols if sims[r, c] > 0]
+    return result
+
+def _save(neighbours, ids, post_ids):
+    """
+    Substitui as linhas de related_posts dos posts indicados. Retorna True se
+    alguma lista de vizinhos mudou (só a ordem dos vizinhos aparece nas páginas).
+    """
+    table = RelatedPost.__table__
+    posts = Post.__table__
+    values = [{'post_id': ids[row], 'related_id': ids[col], 'score': score, 'position': position}
+              for row, items in neighbours.items()
+              for position, (col, score) in enumerate(items)]
+    with db.engine.begin() as conn:
+        # Posts excluídos enquanto o cálculo rodava: inserir as linhas deles violaria a FK
+        involved = sorted({v['post_id'] for v in values} | {v['related_id'] for v in values})
+        existing = set()
+        for start in range(0, len(involved), 500):
+            existing.update(conn.execute(select(posts.c.id).where(posts.c.id.in_(involved[start:start + 500]))).scalars())
+        values = [v for v in values if v['post_id'] in existing and v['related_id'] in existing]
+
+        before = {}
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            for post_id, related_id in conn.execute(
+                    select(table.c.post_id, table.c.related_id)
+                    .where(table.c.post_id.in_(chunk)).order_by(table.c.post_id, table.c.position)):
+                before.setdefault(post_id, []).append(related_id)
+            conn.execute(delete(table).where(table.c.post_id.in_(chunk)))
+        for start in range(0, len(values), 5000):
+            conn.execute(insert(table), values[start:start + 5000])
+    after = {}
+    for v in values:
+        after.setdefault(v['post_id'], []).append(v['related_id'])
+    return before != after
+
+def rebuild_all(k):
+    """Recalcula os relacionados de todos os posts publicados. Retorna (posts, houve mudança)."""
+    table = RelatedPost.__table__
+    corpus = Corpus()
+    ids = corpus.refresh()
+    published = select(Post.id).where(Post.publicado == True)
+    with db.engine.begin() as conn:
+        # Posts que deixaram de estar publicados
+        changed = conn.execute(delete(table).where(table.c.post_id.not_in(published))).rowcount > 0
+    if not ids:
+        return 0, changed
+    matrix = corpus.matrix(ids)
+    rows = list(range(len(ids)))
+    for start in range(0, len(rows), 2000):
+        block = rows[start:start + 2000]
+        changed |= _save(top_k(matrix, block, k), ids, [ids[r] for r in block])
+    return len(ids), changed
+
+# Vetores mantidos entre as atualizações incrementais deste processo
+_corpus = Corpus()
+
+def update_posts(post_ids, k):
+    """
+    Atualização incremental após salvar/excluir posts: recalcula os posts
+    alterados e os vizinhos mais próximos deles (que podem passar a incluí-los).
+    Retorna True se alguma lista de relacionados mudou.
+    """
+    table = RelatedPost.__table__
+    ids = _corpus.refresh(post_ids)
+    position = {post_id: row for row, post_id in enumerate(ids)}
+
+    # Posts excluídos ou despublicados saem da tabela e das listas dos outros
+    removed = [post_id for post_id in post_ids if post_id not in position]
+    affected = set()
+    changed_lists = False
+    if removed:
+        affected.update(r for (r,) in db.session.query(RelatedPost.post_id)
+                        .filter(RelatedPost.related_id.in_(removed)))
+        with db.engine.begin() as conn:
+            changed_lists = conn.execute(delete(table).where(table.c.post_id.in_(removed))).rowcount > 0
+
+    changed = [position[post_id] for post_id in post_ids if post_id in position]
+    if not ids or not (changed or affected):
+        return changed_lists
+    matrix = _corpus.matrix(ids)
+    rows = set(changed)
+    for row, items in top_k(matrix, changed, NEIGHBOURS_TO_REFRESH).items():
+        rows.update(col for col, _ in items)
+    rows.update(position[p] for p in affected if p in position)
+    rows = sorted(rows)
+    return _save(top_k(matrix, rows, k), ids, [ids[r] for r in rows]) or changed_lists
+
+def related_posts_for(post_id):
+    """Relacionados de um post (slug e título), em uma consulta pelo índice de related_posts."""
+    return (db.session.query(Post.slug, Post.titulo)
+            .join(RelatedPost, RelatedPost.related_id == Post.id)
+            .filter(RelatedPost.post_id == post_id, Post.publicado == True)
+            .order_by(RelatedPost.position).all())
+
+class RelatedPostsUpdater:
+    """Agenda o recálculo incremental dos relacionados depois de cada commit que altera posts."""
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.count = app.config.get('RELATED_POSTS_COUNT', 5)
+        app.extensions['related_posts'] = self
+        app.cli.add_command(related_rebuild_command)
+
+    def schedule(self, post_ids):
+        if self.app is None:
+            return
+        # Um único worker por processo: as atualizações são aplicadas em ordem
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(1, thread_name_prefix='related-posts')
+                    self._pid = os.getpid()
+        self._executor.submit(self._run, sorted(post_ids))
+
+    def _run(self, post_ids):
+        try:
+            with self.app.app_context():
+                changed = update_posts(post_ids, self.count)
+                db.session.remove()
+            # Os caches de páginas só são descartados se algum relacionado mudou
+            if changed:
+                content_changed()
+        except Exception as e:
+            self.app.logger.error(f"Erro ao atualizar posts relacionados: {e}")
+
+related_updater = RelatedPostsUpdater()
+
+def _mark_post(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault('related_dirty', set()).add(target.id)
+
+def _after_commit(session):
+    dirty = session.info.pop('related_dirty', None)
+    if dirty:
+        related_updater.schedule(dirty)
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    listen(Post, _event, _mark_post)
+listen(Session, 'after_commit', _after_commit)
+listen(Session, 'after_rollback', lambda s: s.info.pop('related_dirty', None))
+
+@click.command('related-rebuild')
+@with_appcontext
+def related_rebuild_command():
+    """Recalcula os posts relacionados de todos os posts publicados."""
+    total, changed = rebuild_all(related_updater.count)
+    if changed:
+        content_changed()
+    click.echo(f"Relacionados recalculados para {total} post(s).")
@@ -0,0 +1,142 @@
+import os
+from urllib.parse import urlencode
+from flask import request, session, current_app, g, Response
+from services.cache import make_cache, content_version, on_content_change
+from services.metrics import metrics
+
+class ResponseCache:
+    """
+    Cache de páginas inteiras para visitantes anônimos (GET/HEAD).
+
+    Os blueprints declaram o TTL com cache_blueprint(); views específicas podem
+    sobrescrevê-lo com @response_cache.cached(ttl=...) ou ficar de fora com
+    @response_cache.exempt. A chave inclui a versão global do conteúdo, então
+    qualquer alteração em Post/Product invalida todas as páginas.
+    """
+
+    def __init__(self, app=None):
+        self.cache = None
+        self._blueprints = {}
+        self._hit_callbacks = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+        self.cache = make_cache(
+            backend,
+            directory=app.config.get('RESPONSE_CACHE_DIR') or os.path.join(app.instance_path, 'response_cache'),
+            default_ttl=app.config.get('RESPONSE_CACHE_DEFAULT_TTL', 300),
+            max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1000),
+            max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+        )
+        self.key_headers = tuple(app.config.get('RESPONSE_CACHE_KEY_HEADERS', ()))
+        self.query_args = frozenset(app.config.get('RESPONSE_CACHE_QUERY_ARGS', ()))
+        app.extensions['response_cache'] = self
+        if backend != 'null':
+            app.before_request(self._serve_from_cache)
+            app.after_request(self._store_response)
+            on_content_change(self.cache.clear)
+
+    # --- Declaração de políticas ---
+    def cache_blueprint(self, blueprint, ttl=None):
+        """Ativa o cache para todas as views do blueprint (ttl=None usa o padrão)."""
+        self._blueprints[blueprint.name] = ttl
+
+    def cached(self, ttl=None):
+        """Define o TTL de uma view específica."""
+        def decorator(view):
+            view._response_cache_ttl = ttl
+            return view
+        return decorator
+
+    def exempt(self, view):
+        """Exclui a view do cache de páginas (ex.: páginas com formulário/CSRF)."""
+        view._response_cache_exempt = True
+        return view
+
+    def on_hit(self, endpoint):
+        """
+        Registra uma função chamada quando a página vem do cache.
+
+        A função recebe os view_args somados aos valores guardados pela view com
+        remember() quando a página foi gerada.
+        """
+        def decorator(func):
+            self._hit_callbacks[endpoint] = func
+            return func
+        return decorator
+
+    def remember(self, **values):
+        """Guarda valores junto da página em cache, repassados aos callbacks de on_hit."""
+        g.response_cache_context = {**g.get('response_cache_context', {}), **values}
+
+    # --- Funcionamento ---
+    def _policy_ttl(self):
+        """Retorna o TTL aplicável à requisição atual, ou False se não deve usar cache."""
+        if request.method not in ('GET', 'HEAD') or request.endpoint is None:
+            return False
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, '_response_cache_exempt', False):
+            return False
+        if hasattr(view, '_response_cache_ttl'):
+            return view._response_cache_ttl or self.cache.default_ttl
+        if request.blueprint not in self._blueprints:
+            return False
+        return self._blueprints[request.blueprint] or self.cache.default_ttl
+
+    def _key(self):
+        # Só os parâmetros que as views usam entram na chave (em ordem fixa): ?utm_*,
+        # parâmetros aleatórios etc. não criam uma nova entrada por variação
+        args = sorted((k, v) for k, values in request.args.lists() if k in self.query_args for v in values)
+        parts = [content_version.current(), request.base_url, urlencode(args)]
+        parts.extend(request.headers.get(h, '') for h in self.key_headers)
+        return 'page:' + '|'.join(parts)
+
+    def _serve_from_cache(self):
+        g.response_cache = None
+        ttl = self._policy_ttl()
+        if not ttl or not is_anonymous_request():
+            return None
+        # A chave é fixada antes da view: se o conteúdo mudar durante a requisição,
+        # a página gerada fica associada à versão antiga
+        g.response_cache = (self._key(), ttl)
+        entry = self.cache.get(g.response_cache[0])
+        metrics.cache_event('page', entry is not None)
+        if entry is None:
+            return None
+        # Entradas gravadas antes do contexto existir têm só três campos
+        status, headers, body, context = entry if len(entry) == 4 else (*entry, {})
+        callback = self._hit_callbacks.get(request.endpoint)
+        if callback is not None:
+            callback({**(request.view_args or {}), **context})
+        response = Response(body, status=status, headers=headers)
+        response.headers['X-Cache'] = 'HIT'
+        return response.make_conditional(request)
+
+    def _store_response(self, response):
+        pending = g.get('response_cache')
+        if pending is None or response.headers.get('X-Cache') == 'HIT':
+            return response
+        key, ttl = pending
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or session.modified or 'Set-Cookie' in response.headers
+                or response.cache_control.private or response.cache_control.no_store
+                or not is_anonymous_request()):
+            return response
+        body = response.get_data()
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ('set-cookie', 'x-cache')]
+        context = g.get('response_cache_context', {})
+        self.cache.set(key, (response.status_code, headers, body, context), ttl, size=len(body))
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+def is_anonymous_request():
+    """Sessões autenticadas, com mensagens flash ou 'lembrar-me' não são anônimas."""
+    if request.cookies.get('remember_token'):
+        return False
+    if not request.cookies.get(current_app.config['SESSION_COOKIE_NAME']):
+        return True
+    return '_user_id' not in session and '_flashes' not in session
+
+response_cache = ResponseCache()
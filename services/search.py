@@ -0,0 +1,195 @@
+"""
+Busca textual nos posts.
+
+- SQLite: tabela virtual FTS5 'posts_fts' (rowid = id do post), ranking bm25.
+- PostgreSQL: tabela 'posts_search' com tsvector (índice GIN), ranking ts_rank_cd.
+- Outros bancos: LIKE em título e resumo (sem trecho destacado).
+
+O índice guarda o texto sem HTML de titulo, resumo e conteudo e é mantido pelos
+listeners de Post em models.py.
+"""
+import re
+import time
+import click
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import text, inspect as sa_inspect, DateTime, String
+from extensions import db
+from services.text import html_to_text
+
+TERM_RE = re.compile(r'\w+', re.UNICODE)
+# Marcadores usados no trecho antes de escapar o HTML (viram <mark>)
+MARK_START, MARK_END = '\x02', '\x03'
+
+SQLITE_SCHEMA = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "titulo, resumo, conteudo, tokenize='unicode61 remove_diacritics 2')",
+]
+POSTGRES_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS posts_search ("
+    "post_id INTEGER PRIMARY KEY REFERENCES posts(id) ON DELETE CASCADE, "
+    "documento TSVECTOR NOT NULL, texto TEXT NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_documento ON posts_search USING GIN (documento)",
+]
+
+# Só o resultado positivo fica em cache: sem a tabela, a verificação é refeita a
+# cada AVAILABILITY_RECHECK segundos (o índice pode ser criado com o app rodando)
+AVAILABILITY_RECHECK = 60
+_available = {}
+
+def _dialect(bind):
+    return bind.dialect.name
+
+def _index_table(bind):
+    return {'sqlite': 'posts_fts', 'postgresql': 'posts_search'}.get(_dialect(bind))
+
+def index_available(bind):
+    """Verifica se a tabela do índice existe (uma vez por banco, se existir)."""
+    table = _index_table(bind)
+    if table is None:
+        return False
+    key = str(bind.engine.url)
+    checked = _available.get(key)
+    if checked is True:
+        return True
+    if checked is None or time.monotonic() - checked >= AVAILABILITY_RECHECK:
+        if sa_inspect(bind).has_table(table):
+            _available[key] = True
+            return True
+        # Guarda o momento da verificação negativa
+        _available[key] = time.monotonic()
+    return False
+
+def ensure_schema():
+    """Cria a estrutura do índice, se ainda não existir."""
+    bind = db.engine
+    statements = {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(_dialect(bind), [])
+    with bind.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    _available.pop(str(bind.engine.url), None)
+
+# --- Sincronização (chamada pelos listeners de Post) ---
+def index_post(connection, post):
+    if not index_available(connection):
+        return
+    titulo, resumo = post.titulo or '', post.resumo or ''
+    conteudo = post.texto_plano if post.texto_plano is not None else html_to_text(post.conteudo)
+    if _dialect(connection) == 'sqlite':
+        connection.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {'id': post.id})
+        connection.execute(text("INSERT INTO posts_fts (rowid, titulo, resumo, conteudo) "
+                                "VALUES (:id, :titulo, :resumo, :conteudo)"),
+                           {'id': post.id, 'titulo': titulo, 'resumo': resumo, 'conteudo': conteudo})
+    else:
+        connection.execute(text(
+            "INSERT INTO posts_search (post_id, documento, texto) VALUES (:id, "
+            "setweight(to_tsvector('portuguese', :titulo), 'A') || "
+            "setweight(to_tsvector('portuguese', :resumo), 'B') || "
+            "setweight(to_tsvector('portuguese', :conteudo), 'C'), :texto) "
+            "ON CONFLICT (post_id) DO UPDATE SET documento = EXCLUDED.documento, texto = EXCLUDED.texto"),
+            {'id': post.id, 'titulo': titulo, 'resumo': resumo, 'conteudo': conteudo,
+             'texto': ' '.join(p for p in (titulo, resumo, conteudo) if p)})
+
+def unindex_post(connection, post):
+    if not index_available(connection):
+        return
+    if _dialect(connection) == 'sqlite':
+        connection.execute(text("DELETE FROM posts_fts WHERE rowid = :id"), {'id': post.id})
+    else:
+        connection.execute(text("DELETE FROM posts_search WHERE post_id = :id"), {'id': post.id})
+
+# --- Consulta ---
+def _results_query(sql):
+    """SQL textual com os tipos das colunas (datas convertidas para datetime em qualquer banco)."""
+    return text(sql).columns(slug=String, titulo=String, data_criacao=DateTime, trecho=String)
+
+def _highlight(snippet):
+    """Escapa o trecho e converte os marcadores em <mark>."""
+    return Markup(str(escape(snippet or '')).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+def search_posts(query, page=1, per_page=10):
+    """
+    Busca posts publicados. Retorna (resultados, total), onde cada resultado é um
+    dicionário com slug, titulo, data_criacao e trecho (Markup com <mark>).
+    """
+    terms = TERM_RE.findall(query or '')
+    if not terms:
+        return [], 0
+    offset = (page - 1) * per_page
+    bind = db.session.get_bind()
+    dialect = _dialect(bind)
+
+    if dialect == 'sqlite' and index_available(bind):
+        # Cada termo vira "termo"* (prefixo); espaço = E lógico no FTS5
+        match = ' '.join(f'"{t}"*' for t in terms)
+        params = {'q': match, 'limit': per_page, 'offset': offset}
+        base = ("FROM posts_fts JOIN posts p ON p.id = posts_fts.rowid "
+                "WHERE posts_fts MATCH :q AND p.publicado = 1")
+        total = db.session.execute(text(f"SELECT count(*) {base}"), params).scalar()
+        rows = db.session.execute(_results_query(
+            f"SELECT p.slug, p.titulo, p.data_criacao, "
+            f"snippet(posts_fts, 2, '{MARK_START}', '{MARK_END}', '…', 30) AS trecho "
+            f"{base} ORDER BY bm25(posts_fts, 10.0, 4.0, 1.0) LIMIT :limit OFFSET :offset"), params)
+    elif dialect == 'postgresql' and index_available(bind):
+        params = {'q': ' '.join(terms), 'limit': per_page, 'offset': offset}
+        base = ("FROM posts_search s JOIN posts p ON p.id = s.post_id, "
+                "websearch_to_tsquery('portuguese', :q) consulta "
+                "WHERE s.documento @@ consulta AND p.publicado")
+        total = db.session.execute(text(f"SELECT count(*) {base}"), params).scalar()
+        rows = db.session.execute(_results_query(
+            f"SELECT p.slug, p.titulo, p.data_criacao, "
+            f"ts_headline('portuguese', s.texto, consulta, "
+            f"'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=35, MinWords=15') AS trecho "
+            f"{base} ORDER BY ts_rank_cd(s.documento, consulta) DESC LIMIT :limit OFFSET :offset"), params)
+    else:
+        # Sem índice textual: busca simples em título e resumo
+        like = f"%{' '.join(terms)}%"
+        params = {'q': like, 'limit': per_page, 'offset': offset}
+        base = "FROM posts p WHERE p.publicado = :pub AND (p.titulo LIKE :q OR p.resumo LIKE :q)"
+        params['pub'] = True
+        total = db.session.execute(text(f"SELECT count(*) {base}"), params).scalar()
+        rows = db.session.execute(_results_query(
+            f"SELECT p.slug, p.titulo, p.data_criacao, p.resumo AS trecho {base} "
+            f"ORDER BY p.data_criacao DESC LIMIT :limit OFFSET :offset"), params)
+
+    results = [{'slug': r.slug, 'titulo': r.titulo, 'data_criacao': r.data_criacao,
+                'trecho': _highlight(r.trecho)} for r in rows]
+    return results, total
+
+def reindex(batch_size=500):
+    """
+    Cria (se preciso) e reconstrói o índice de busca textual dos posts.
+
+    Retorna o número de posts indexados, ou None se o banco não tem busca textual.
+    """
+    from models import Post
+    ensure_schema()
+    bind = db.engine
+    if _index_table(bind) is None:
+        return None
+    with bind.begin() as conn:
+        conn.execute(text(f"DELETE FROM {_index_table(bind)}"))
+    total = 0
+    last_id = 0
+    while True:
+        posts = (Post.query.filter(Post.id > last_id).order_by(Post.id).limit(batch_size).all())
+        if not posts:
+            break
+        with bind.begin() as conn:
+            for post in posts:
+                index_post(conn, post)
+        total += len(posts)
+        last_id = posts[-1].id
+        db.session.expunge_all()
+    return total
+
+@click.command('search-reindex')
+@click.option('--batch-size', default=500, show_default=True)
+@with_appcontext
+def search_reindex_command(batch_size):
+    """Cria (se preciso) e reconstrói o índice de busca textual dos posts."""
+    total = reindex(batch_size)
+    if total is None:
+        click.echo(f"Busca textual não suportada em '{_dialect(db.engine)}': usando LIKE.")
+    else:
+        click.echo(f"{total} post(s) indexado(s).")
@@ -0,0 +1,35 @@
+from collections import namedtuple
+from flask import current_app
+from models import Post
+from routes.solutions import SOLUTIONS_CONFIG
+from services.cache import local_cache
+
+SIDEBAR_POSTS = 5
+
+# Registro leve (sem sessão do SQLAlchemy) que pode ser compartilhado entre requisições
+SidebarPost = namedtuple('SidebarPost', 'id slug titulo')
+
+def _ttl():
+    return current_app.config.get('SIDEBAR_CACHE_TTL', 300)
+
+def recent_posts():
+    """Posts publicados mais recentes (um a mais que o sidebar, para poder excluir o atual)."""
+    def load():
+        rows = (Post.query.with_entities(Post.id, Post.slug, Post.titulo)
+                .filter_by(publicado=True)
+                .order_by(Post.data_criacao.desc(), Post.id.desc())
+                .limit(SIDEBAR_POSTS + 1).all())
+        return [SidebarPost(*row) for row in rows]
+    return local_cache.get_or_set('sidebar:posts', load, _ttl())
+
+def active_solutions():
+    return local_cache.get_or_set(
+        'sidebar:active_solutions',
+        lambda: {k: v for k, v in SOLUTIONS_CONFIG.items() if v['status'] == 'active'},
+        _ttl())
+
+def featured_solutions():
+    return local_cache.get_or_set(
+        'sidebar:featured_solutions',
+        lambda: {k: v for k, v in active_solutions().items() if v.get('featured', False)},
+        _ttl())
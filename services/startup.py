@@ -0,0 +1,66 @@
+"""
+Inicialização da aplicação nos servidores WSGI.
+
+wsgi.py cria uma única aplicação por processo; com o preload do gunicorn ela é
+criada só no processo mestre e herdada pelos workers no fork (copy-on-write).
+Aqui ficam o cache de bytecode dos templates em disco (JINJA_BYTECODE_CACHE_DIR),
+a pré-compilação de todos os templates e o registro dos tempos de inicialização.
+"""
+import os
+import resource
+import time
+from jinja2 import FileSystemBytecodeCache
+
+TEMPLATE_EXTENSIONS = ('.html', '.xml', '.txt')
+
+def init_app(app):
+    directory = app.config.get('JINJA_BYTECODE_CACHE_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        # Compilado uma vez e reaproveitado entre processos e reinícios (inválido se o fonte mudar)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+def precompile_templates(app):
+    """Carrega todos os templates no cache do ambiente Jinja. Retorna quantos foram compilados."""
+    env = app.jinja_env
+    names = env.list_templates(filter_func=lambda name: name.endswith(TEMPLATE_EXTENSIONS))
+    # Sem espaço para todos, os primeiros seriam descartados antes da primeira requisição
+    if env.cache is not None and getattr(env.cache, 'capacity', len(names)) < len(names):
+        app.logger.warning(f"O cache de templates comporta menos que os {len(names)} templates.")
+    compiled = 0
+    for name in names:
+        try:
+            env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            app.logger.warning(f"Template {name} não pôde ser pré-compilado: {e}")
+    return compiled
+
+def rss_mb():
+    """Memória residente atual do processo (MB); no máximo o pico, fora do Linux."""
+    try:
+        with open('/proc/self/statm') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def record(app, started, imported, created, templates):
+    """Guarda em app.extensions['startup'] e registra no log os tempos de inicialização (ms)."""
+    done = time.perf_counter()
+    report = {
+        'pid': os.getpid(),
+        'imports_ms': round((imported - started) * 1000, 1),
+        'create_app_ms': round((created - imported) * 1000, 1),
+        'templates_ms': round((done - created) * 1000, 1),
+        'total_ms': round((done - started) * 1000, 1),
+        'templates': templates,
+        'rss_mb': rss_mb(),
+    }
+    app.extensions['startup'] = report
+    app.logger.info(format_report(report))
+    return report
+
+def format_report(report):
+    return (f"Aplicação iniciada em {report['total_ms']} ms (imports {report['imports_ms']} ms, "
+            f"create_app {report['create_app_ms']} ms, {report['templates']} templates em "
+            f"{report['templates_ms']} ms), RSS {report['rss_mb']} MB")
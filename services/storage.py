@@ -0,0 +1,132 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+import click
+from flask import current_app, request
+from flask.cli import with_appcontext
+from extensions import db
+from models import Post, Product
+from services.images import strip_metadata
+
+CHUNK_SIZE = 64 * 1024
+ONE_YEAR = 365 * 24 * 3600
+
+# Referências a uploads dentro do HTML dos posts (src="/static/uploads/ab/<hash>.jpg", etc.)
+UPLOAD_REF_RE = re.compile(r'uploads/[\w./-]+')
+# Variações geradas pelo pipeline de imagens: <nome>-<largura>.<ext> e <nome>.json
+VARIANT_SUFFIX_RE = re.compile(r'-\d+$')
+
+def store_upload(file_storage):
+    """
+    Grava um arquivo enviado com o nome igual ao hash do conteúdo (SHA-256).
+
+    O arquivo é lido em blocos, calculando o hash enquanto é copiado para um
+    temporário, sem carregá-lo inteiro na memória. Se o mesmo conteúdo já existe,
+    o temporário é descartado. Os metadados das imagens (EXIF/GPS) são removidos
+    do arquivo gravado. Retorna (caminho relativo a static/, criado).
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    os.makedirs(upload_folder, exist_ok=True)
+    _, ext = os.path.splitext(file_storage.filename or '')
+    ext = ext.lower()
+
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                tmp.write(chunk)
+
+        name = digest.hexdigest()
+        directory = os.path.join(upload_folder, name[:2])
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            created = False
+        else:
+            # O original também é servido (ex.: imagens no corpo dos posts): sem EXIF/GPS
+            try:
+                strip_metadata(tmp_path)
+            except ValueError as e:
+                current_app.logger.warning(f"Metadados não removidos de {file_storage.filename}: {e}")
+            os.replace(tmp_path, path)
+            created = True
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return os.path.relpath(path, current_app.static_folder).replace(os.sep, '/'), created
+
+def upload_path(relative_path):
+    """Caminho absoluto de um arquivo a partir do caminho relativo a static/."""
+    return os.path.join(current_app.static_folder, relative_path)
+
+def init_app(app):
+    """Uploads têm nome derivado do conteúdo: podem ser cacheados para sempre."""
+    uploads_prefix = os.path.relpath(app.config['UPLOAD_FOLDER'], app.static_folder).replace(os.sep, '/') + '/'
+
+    @app.after_request
+    def immutable_uploads(response):
+        if request.endpoint == 'static' and response.status_code in (200, 304) and \
+                (request.view_args or {}).get('filename', '').startswith(uploads_prefix):
+            response.cache_control.public = True
+            response.cache_control.max_age = ONE_YEAR
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+        return response
+
+    app.cli.add_command(uploads_gc_command)
+
+def _stem(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return VARIANT_SUFFIX_RE.sub('', name)
+
+def referenced_stems():
+    """Nomes (sem extensão/variação) de todos os uploads usados por posts e produtos."""
+    stems = set()
+    posts = db.session.query(Post.imagem, Post.conteudo).yield_per(500)
+    for imagem, conteudo in posts:
+        if imagem:
+            stems.add(_stem(imagem))
+        for ref in UPLOAD_REF_RE.findall(conteudo or ''):
+            stems.add(_stem(ref))
+    for (image_file,) in db.session.query(Product.image_file).yield_per(500):
+        if image_file:
+            stems.add(_stem(image_file))
+    return stems
+
+@click.command('uploads-gc')
+@click.option('--dry-run', is_flag=True, help='Apenas lista o que seria removido.')
+@click.option('--grace-hours', default=24, show_default=True,
+              help='Não remove arquivos mais novos que isso (uploads ainda não salvos em um post).')
+@with_appcontext
+def uploads_gc_command(dry_run, grace_hours):
+    """Remove uploads que não são referenciados por nenhum post ou produto."""
+    stems = referenced_stems()
+    cutoff = time.time() - grace_hours * 3600
+    removed = freed = 0
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    for root, _, files in os.walk(upload_folder, topdown=False):
+        for filename in files:
+            path = os.path.join(root, filename)
+            if _stem(filename) in stems or os.path.getmtime(path) > cutoff:
+                continue
+            size = os.path.getsize(path)
+            if dry_run:
+                click.echo(f"[dry-run] {os.path.relpath(path, current_app.static_folder)}")
+            else:
+                os.remove(path)
+            removed += 1
+            freed += size
+        if not dry_run and root != upload_folder and not os.listdir(root):
+            os.rmdir(root)
+    action = 'seriam removidos' if dry_run else 'removidos'
+    click.echo(f"{removed} arquivo(s) {action} ({freed / 1024 / 1024:.1f} MB).")
@@ -0,0 +1,143 @@
+import re
+import unicodedata
+from html import escape
+from html.parser import HTMLParser
+
+# Tags cujo conteúdo não é texto legível
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+# Tags de bloco: viram quebra de palavra ao extrair o texto
+BLOCK_TAGS = {'p', 'div', 'br', 'li', 'ul', 'ol', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote',
+              'pre', 'table', 'tr', 'td', 'th', 'section', 'article', 'figure', 'figcaption', 'hr'}
+WHITESPACE_RE = re.compile(r'\s+')
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip:
+            self._skip -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(html):
+    """Extrai o texto legível de um trecho HTML (sem tags, entidades decodificadas)."""
+    if not html:
+        return ''
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return WHITESPACE_RE.sub(' ', ''.join(parser.parts)).strip()
+
+def normalize(text):
+    """Minúsculas e sem acentos (comparação insensível a acentuação)."""
+    # Decompõe os acentos e descarta o que não é ASCII (em C, sem laço por caractere)
+    return unicodedata.normalize('NFD', text or '').encode('ascii', 'ignore').decode('ascii').lower()
+
+# Sanitização do HTML dos posts: só estas tags/atributos sobrevivem
+ALLOWED_TAGS = {'p', 'br', 'hr', 'div', 'span', 'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'small',
+                'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'blockquote', 'pre', 'code', 'a', 'img',
+                'figure', 'figcaption', 'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption',
+                'iframe'}
+VOID_TAGS = {'br', 'hr', 'img'}
+ALLOWED_ATTRS = {
+    'a': {'href', 'title', 'target', 'rel'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'iframe': {'src', 'width', 'height', 'title', 'allow', 'allowfullscreen'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+    '*': {'class'},
+}
+SAFE_URL_RE = re.compile(r'^(https?:|mailto:|/|#|[^:]*$)', re.I)
+# Vídeos incorporados pelo CKEditor
+IFRAME_SRC_RE = re.compile(r'^https://(www\.)?(youtube\.com|youtube-nocookie\.com|player\.vimeo\.com)/', re.I)
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.open_tags = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+            return
+        if self._skip or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRS.get(tag, set()) | ALLOWED_ATTRS['*']
+        clean = []
+        for name, value in attrs:
+            value = (value or '').strip()
+            if name not in allowed:
+                continue
+            if name in ('href', 'src') and not SAFE_URL_RE.match(value):
+                continue
+            clean.append((name, value))
+        if tag == 'iframe' and not IFRAME_SRC_RE.match(dict(clean).get('src', '')):
+            self._skip += 1  # descarta o iframe e o que houver dentro dele
+            self.open_tags.append('#skip')
+            return
+        if tag == 'a' and dict(clean).get('target') == '_blank':
+            clean = [(n, v) for n, v in clean if n != 'rel'] + [('rel', 'noopener noreferrer')]
+        rendered = ''.join(f' {n}="{escape(v)}"' for n, v in clean)
+        self.parts.append(f'<{tag}{rendered}>')
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] in (tag, '#skip'):
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            if self._skip:
+                self._skip -= 1
+            return
+        if tag == 'iframe' and '#skip' in self.open_tags:
+            self.open_tags.remove('#skip')
+            self._skip -= 1
+            return
+        if self._skip or tag not in self.open_tags:
+            return
+        # Fecha também as tags que ficaram abertas dentro desta
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.parts.append(f'</{current}>')
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(escape(data, quote=False))
+
+def sanitize_html(html):
+    """HTML do post com tags/atributos permitidos, URLs seguras e tags balanceadas."""
+    if not html:
+        return ''
+    parser = _Sanitizer()
+    parser.feed(html)
+    parser.close()
+    parser.parts.extend(f'</{tag}>' for tag in reversed(parser.open_tags) if tag != '#skip')
+    return ''.join(parser.parts).strip()
+
+def excerpt(text, length=160):
+    """Trecho do texto com até 'length' caracteres, cortado no fim de uma palavra."""
+    text = WHITESPACE_RE.sub(' ', text or '').strip()
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1].rsplit(' ', 1)[0].rstrip(' ,.;:-')
+    return cut + '…'
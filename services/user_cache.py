@@ -0,0 +1,46 @@
+from flask_login import UserMixin
+from services.cache import TTLCache, ContentVersion
+
+_NOT_FOUND = object()
+
+class CachedUser(UserMixin):
+    """Usuário autenticado sem vínculo com a sessão do SQLAlchemy (seguro para guardar em cache)."""
+    __slots__ = ('id', 'username')
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+    def __repr__(self):
+        return f'<CachedUser {self.username}>'
+
+class UserCache:
+    """
+    Cache por processo do user_loader do Flask-Login, com TTL.
+
+    Qualquer alteração em User (ex.: 'flask set-password') gera uma nova versão
+    no arquivo instance/user_version; os demais processos a detectam em até
+    CONTENT_VERSION_CHECK_INTERVAL e descartam os usuários em cache.
+    """
+
+    def __init__(self):
+        self.cache = TTLCache(default_ttl=300)
+        self.version = ContentVersion('user_version', callbacks=[self.cache.clear])
+
+    def init_app(self, app):
+        self.cache.default_ttl = app.config.get('USER_CACHE_TTL', 300)
+        self.version.init_app(app)
+
+    def get(self, user_id, loader):
+        key = f'{self.version.current()}:{user_id}'
+        user = self.cache.get(key)
+        if user is None:
+            user = loader(user_id) or _NOT_FOUND
+            self.cache.set(key, user)
+        return None if user is _NOT_FOUND else user
+
+    def invalidate(self):
+        self.version.bump()
+        self.cache.clear()
+
+user_cache = UserCache()
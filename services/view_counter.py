@@ -0,0 +1,130 @@
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+import click
+from flask import has_request_context, request
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, func
+from extensions import db
+
+# Chave do environ WSGI que marca requisições que não contam visualização
+NOT_A_VIEW_ENVIRON_KEY = 'mentemagna.not_a_view'
+
+class ViewCounter:
+    """
+    Contador de visualizações em memória, com gravação em lote.
+
+    Cada worker acumula os incrementos por post (pelo id, que não muda quando o
+    título e o slug são editados) e os grava periodicamente, ou ao atingir um limite
+    de pendências, com um único UPDATE atômico em lote (views = views + :n).
+    Assim a leitura de um post não abre transação de escrita.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 30)
+        self.max_pending = app.config.get('VIEW_COUNTER_FLUSH_SIZE', 500)
+        # Arquivo usado pelo comando CLI para pedir um flush aos workers em execução
+        self.request_file = os.path.join(app.instance_path, 'view_counter.flush')
+        self._request_seen = self._request_mtime()
+        app.extensions['view_counter'] = self
+        app.cli.add_command(flush_views_command)
+        atexit.register(self.flush)
+
+    def record(self, post_id):
+        """Registra uma visualização. Não toca no banco de dados."""
+        # Requisições internas (ex.: as do freeze) não são visitas
+        if has_request_context() and request.environ.get(NOT_A_VIEW_ENVIRON_KEY):
+            return
+        with self._lock:
+            self._pending[post_id] += 1
+            total = sum(self._pending.values())
+        self._ensure_thread()
+        if total >= self.max_pending or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self):
+        """Grava todos os incrementos pendentes. Retorna o número de posts atualizados."""
+        if self.app is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            posts = db.metadata.tables['posts']
+            stmt = (posts.update()
+                    .where(posts.c.id == bindparam('post_id'))
+                    # Mantém data_atualizacao: contagem de views não é edição de conteúdo
+                    .values(views=func.coalesce(posts.c.views, 0) + bindparam('n'),
+                            data_atualizacao=posts.c.data_atualizacao))
+            params = [{'post_id': post_id, 'n': n} for post_id, n in pending.items()]
+            try:
+                with self.app.app_context():
+                    with db.engine.begin() as conn:
+                        conn.execute(stmt, params)
+            except Exception as e:
+                # Devolve os incrementos ao buffer para a próxima tentativa
+                with self._lock:
+                    self._pending.update(pending)
+                self.app.logger.error(f"Erro ao gravar visualizações: {e}")
+                return 0
+            return len(params)
+
+    def _ensure_thread(self):
+        """Inicia (uma vez por processo) a thread que grava o buffer por intervalo."""
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._lock:
+            # Após um fork (gunicorn --preload) a thread do processo pai não existe mais
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+
+    def request_flush(self):
+        """Pede a todos os workers em execução que gravem seus buffers."""
+        with open(self.request_file, 'a'):
+            os.utime(self.request_file, None)
+
+    def _request_mtime(self):
+        try:
+            return os.stat(self.request_file).st_mtime
+        except OSError:
+            return None
+
+    def _run(self):
+        while True:
+            time.sleep(1)
+            requested = self._request_mtime()
+            if requested != self._request_seen:
+                self._request_seen = requested
+                self.flush()
+            elif time.monotonic() - self._last_flush >= self.interval:
+                self.flush()
+
+view_counter = ViewCounter()
+
+@click.command('flush-views')
+@with_appcontext
+def flush_views_command():
+    """Força a gravação das visualizações pendentes em todos os workers."""
+    view_counter.flush()
+    view_counter.request_flush()
+    click.echo("Gravação das visualizações pendentes solicitada aos workers.")
@@ -0,0 +1,75 @@
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Pasta de instância e banco SQLite temporários (o banco em arquivo permite que as
+# threads de segundo plano usem conexões próprias)
+INSTANCE = tempfile.mkdtemp(prefix='mentemagna-tests-')
+os.environ['FLASK_INSTANCE_PATH'] = INSTANCE
+os.environ['TEST_DATABASE_URL'] = f"sqlite:///{os.path.join(INSTANCE, 'test.db')}"
+
+from run import create_app
+from extensions import db
+from models import Post
+from services import search
+from services.cache import content_changed
+from services.related import related_updater
+from services.view_counter import view_counter
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app('testing')
+    app.config['SERVER_NAME'] = 'localhost'
+    # Os relacionados são recalculados em uma thread; os testes chamam update_posts() diretamente
+    patch = pytest.MonkeyPatch()
+    patch.setattr(related_updater, 'schedule', lambda post_ids: None)
+    with app.app_context():
+        db.create_all()
+        search.ensure_schema()
+    yield app
+    patch.undo()
+    shutil.rmtree(INSTANCE, ignore_errors=True)
+
+@pytest.fixture(autouse=True)
+def clean_database(app):
+    # Sem contexto ativo durante o teste: as requisições rodam como em produção
+    # (ex.: corpo gerado depois que a view retorna)
+    yield
+    # Ids são reaproveitados entre testes: visualizações pendentes não podem sobrar
+    view_counter._pending.clear()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            for table in reversed(db.metadata.sorted_tables):
+                conn.execute(table.delete())
+            conn.execute(db.text("DELETE FROM posts_fts"))
+        content_changed()
+
+@pytest.fixture
+def uploads(app, monkeypatch):
+    """Pasta de uploads própria do teste (dentro de static/, como em produção)."""
+    folder = tempfile.mkdtemp(prefix='tests-', dir=os.path.join(app.static_folder, 'uploads'))
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', folder)
+    yield folder
+    shutil.rmtree(folder, ignore_errors=True)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_post(app):
+    """Cria um post (em um contexto próprio) e o devolve desanexado da sessão."""
+    def make(titulo='Post de teste', conteudo='<p>Conteúdo do post</p>', publicado=True, **kwargs):
+        with app.app_context():
+            post = Post(titulo=titulo, conteudo=conteudo, publicado=publicado, **kwargs)
+            db.session.add(post)
+            db.session.commit()
+            db.session.refresh(post)
+            db.session.expunge(post)
+        return post
+    return make
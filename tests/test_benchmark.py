@@ -0,0 +1,15 @@
+from extensions import db
+from models import Post
+
+def test_bench_seed_continues_after_gaps(app):
+    runner = app.test_cli_runner()
+    assert runner.invoke(args=['bench-seed', '--posts', '5', '--products', '2']).exit_code == 0
+    with app.app_context():
+        Post.query.filter(Post.slug == 'bench-1').delete()
+        db.session.commit()
+    # Com a contagem de linhas, bench-4 seria gerado de novo (IntegrityError)
+    result = runner.invoke(args=['bench-seed', '--posts', '3', '--products', '2'])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        slugs = {slug for (slug,) in db.session.query(Post.slug)}
+    assert {'bench-5', 'bench-6', 'bench-7'} <= slugs and 'bench-1' not in slugs
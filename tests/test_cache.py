@@ -0,0 +1,39 @@
+import os
+import time
+from services.cache import FileSystemCache, LRUCache
+from services.response_cache import response_cache
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('a') == 1 and cache.get('b') is None and cache.get('c') == 3
+
+def test_filesystem_cache_prunes_by_entries(tmp_path):
+    cache = FileSystemCache(str(tmp_path), max_entries=5, prune_every=1)
+    for i in range(20):
+        cache.set(f'page:{i}', b'x' * 10)
+    assert len(os.listdir(tmp_path)) <= 5
+    assert cache.get('page:19') == b'x' * 10
+
+def test_filesystem_cache_prunes_by_bytes_keeping_recent_reads(tmp_path):
+    cache = FileSystemCache(str(tmp_path), max_bytes=4096, prune_every=1)
+    cache.set('hot', b'h' * 1000)
+    for i in range(10):
+        time.sleep(0.01)
+        cache.set(f'cold:{i}', b'c' * 1000)
+        # A leitura renova a data de uso do item
+        cache.get('hot')
+    assert sum(os.path.getsize(os.path.join(tmp_path, n)) for n in os.listdir(tmp_path)) <= 4096
+    assert cache.get('hot') == b'h' * 1000
+    assert cache.get('cold:0') is None
+
+def test_response_cache_key_ignores_unknown_query_args(app):
+    def key(url):
+        with app.test_request_context(url):
+            return response_cache._key()
+    assert key('/blog/?utm_source=x&fbclid=1') == key('/blog/')
+    assert key('/blog/busca?q=flask&pagina=2') == key('/blog/busca?pagina=2&q=flask')
+    assert key('/blog/busca?q=flask') != key('/blog/busca?q=django')
@@ -0,0 +1,43 @@
+from routes.solutions import SOLUTIONS_CONFIG
+from services.code_search import CodeIndex
+
+ENTRIES = [
+    ('A00', 'Cólera'),
+    ('A00.1', 'Cólera devida a Vibrio cholerae 01, biótipo El Tor'),
+    ('J45', 'Asma'),
+    ('J45.0', 'Asma predominantemente alérgica'),
+    ('J46', 'Estado de mal asmático'),
+]
+
+def test_code_prefix_and_description_search():
+    index = CodeIndex(ENTRIES)
+    assert [r['code'] for r in index.search('J45')] == ['J45', 'J45.0']
+    assert [r['code'] for r in index.search('colera')][0] == 'A00'
+    # Último termo como prefixo, sem acentos; a palavra exata vem antes
+    assert [r['code'] for r in index.search('asma')] == ['J45', 'J45.0', 'J46']
+    assert [r['code'] for r in index.search('asm')][:2] == ['J45', 'J45.0']
+    assert index.search('alergica asma')[0]['code'] == 'J45.0'
+
+def _local_index_slug(monkeypatch):
+    monkeypatch.setitem(SOLUTIONS_CONFIG, 'cid-local', {'name': 'CID local', 'status': 'active',
+                                                        'type': 'local_index', 'data_file': 'cid.csv'})
+    return 'cid-local'
+
+def test_search_endpoint_reads_csv(app, client, tmp_path, monkeypatch):
+    slug = _local_index_slug(monkeypatch)
+    (tmp_path / 'cid.csv').write_text(
+        'codigo;descricao\n' + '\n'.join(f'{c};{d}' for c, d in ENTRIES), encoding='utf-8')
+    monkeypatch.setitem(app.config, 'CODE_TABLES_FOLDER', str(tmp_path))
+    response = client.get(f'/solucoes/{slug}/api/search?q=asma')
+    assert response.status_code == 200
+    assert [r['code'] for r in response.get_json()['results']] == ['J45', 'J45.0', 'J46']
+    # limit fora da faixa é ajustado para 1..100
+    for limit, expected in (('2', 2), ('0', 1), ('-5', 1), ('1000', 3)):
+        response = client.get(f'/solucoes/{slug}/api/search?q=asma&limit={limit}')
+        assert len(response.get_json()['results']) == expected
+
+def test_missing_table_returns_empty_results(app, client, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'CODE_TABLES_FOLDER', str(tmp_path / 'nao-existe'))
+    response = client.get(f'/solucoes/{_local_index_slug(monkeypatch)}/api/search?q=asma')
+    assert response.status_code == 200
+    assert response.get_json() == {'results': []}
@@ -0,0 +1,28 @@
+def test_blog_etag_and_304(client, make_post):
+    make_post(titulo='Primeiro')
+    first = client.get('/blog/')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('W/')
+    assert 'no-cache' in first.headers['Cache-Control']
+
+    cached = client.get('/blog/', headers={'If-None-Match': etag})
+    assert cached.status_code == 304 and cached.data == b''
+
+    # Conteúdo novo: o ETag muda e a página é renderizada de novo
+    make_post(titulo='Segundo')
+    fresh = client.get('/blog/', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200 and fresh.headers['ETag'] != etag
+
+def test_post_if_modified_since(client, make_post):
+    make_post(titulo='Artigo')
+    first = client.get('/blog/artigo')
+    assert first.status_code == 200
+    last_modified = first.headers['Last-Modified']
+    assert client.get('/blog/artigo', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+def test_flash_messages_are_never_304(app, client, make_post):
+    make_post(titulo='Artigo')
+    etag = client.get('/blog/artigo').headers['ETag']
+    with client.session_transaction() as session:
+        session['_flashes'] = [('info', 'Mensagem')]
+    assert client.get('/blog/artigo', headers={'If-None-Match': etag}).status_code == 200
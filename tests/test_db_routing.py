@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roda em outro processo: o bind da réplica é definido na criação da aplicação,
+# e a aplicação compartilhada dos testes não tem réplica
+SCRIPT = '''
+import os, shutil, sys
+from run import create_app
+from extensions import db
+from models import Post
+from services import search
+from services.db_routing import REPLICA_BIND
+
+primary, replica = sys.argv[1:]
+app = create_app('testing')
+app.config['SERVER_NAME'] = 'localhost'
+with app.app_context():
+    db.create_all(bind_key=None)
+    search.ensure_schema()
+    db.session.add(Post(titulo='Leitura', conteudo='<p>texto</p>', publicado=True))
+    db.session.commit()
+    db.engines[None].dispose()
+shutil.copy(primary, replica)
+client = app.test_client()
+print(client.get('/blog/leitura').status_code)
+
+# A réplica fica ilegível depois da verificação de disponibilidade
+with open(replica, 'wb') as f:
+    f.write(b'isto nao e um banco sqlite' * 100)
+with app.app_context():
+    db.engines[REPLICA_BIND].dispose()
+print(client.get('/blog/').status_code, client.get('/blog/leitura').status_code, client.get('/').status_code)
+'''
+
+def test_unreadable_replica_falls_back_to_primary_mid_request(tmp_path):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    env = dict(os.environ,
+               FLASK_INSTANCE_PATH=str(tmp_path / 'instance'),
+               TEST_DATABASE_URL=f"sqlite:///{primary}",
+               DATABASE_READ_URL=f"sqlite:///{replica}")
+    replica.touch()
+    result = subprocess.run([sys.executable, '-c', SCRIPT, str(primary), str(replica)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['200', '200', '200', '200']
+    assert 'repetida no banco principal' in result.stderr
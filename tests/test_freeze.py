@@ -0,0 +1,57 @@
+from flask import request
+from extensions import db
+from models import Post
+from routes.solutions import SOLUTIONS_CONFIG
+from services import sidebar
+from services.cache import local_cache
+from services.freeze import freeze, output_file
+from services.view_counter import view_counter, NOT_A_VIEW_ENVIRON_KEY
+
+def _freeze(app, directory):
+    with app.app_context():
+        rendered, unchanged, removed, errors = freeze(app, str(directory), 'http://localhost', workers=2)
+    return rendered, unchanged, removed, errors
+
+def test_freeze_is_incremental(app, make_post, tmp_path):
+    first = make_post(titulo='Primeiro post')
+    make_post(titulo='Segundo post')
+    rendered, unchanged, removed, errors = _freeze(app, tmp_path)
+    assert errors == [] and rendered > 0 and unchanged == 0
+    assert output_file(str(tmp_path), '/blog/primeiro-post').endswith('blog/primeiro-post/index.html')
+    assert (tmp_path / 'blog' / 'primeiro-post' / 'index.html').exists()
+
+    # Nada mudou: nada é renderizado de novo
+    assert _freeze(app, tmp_path)[0] == 0
+
+    # Despublicar um post remove a página dele e renderiza as que o listavam
+    with app.app_context():
+        db.session.get(Post, first.id).publicado = False
+        db.session.commit()
+    rendered, _unchanged, removed, errors = _freeze(app, tmp_path)
+    assert removed == 1 and errors == []
+    assert not (tmp_path / 'blog' / 'primeiro-post').exists()
+    assert 0 < rendered < 10
+
+def test_sidebar_pages_depend_on_solutions(app, make_post, tmp_path, monkeypatch):
+    make_post(titulo='Post com sidebar')
+    _freeze(app, tmp_path)
+    with app.app_context():
+        slug = next(iter(sidebar.featured_solutions()))
+    monkeypatch.setitem(SOLUTIONS_CONFIG, slug, dict(SOLUTIONS_CONFIG[slug], name='Nome alterado'))
+    local_cache.clear()
+    _freeze(app, tmp_path)
+    for page in ('sobre', 'blog', 'blog/post-com-sidebar'):
+        assert 'Nome alterado' in (tmp_path / page / 'index.html').read_text('utf-8')
+
+def test_freeze_requests_do_not_count_views(app, make_post, tmp_path):
+    post = make_post(titulo='Post contado')
+    view_counter.flush()
+    _freeze(app, tmp_path)
+    assert view_counter._pending[post.id] == 0
+    with app.test_request_context(environ_overrides={NOT_A_VIEW_ENVIRON_KEY: True}):
+        view_counter.record(post.id)
+    # Visitas reais continuam sendo contadas enquanto o freeze roda
+    with app.test_request_context('/blog/post-contado'):
+        assert not request.environ.get(NOT_A_VIEW_ENVIRON_KEY)
+        view_counter.record(post.id)
+    assert view_counter._pending[post.id] == 1
@@ -0,0 +1,64 @@
+import builtins
+import os
+from extensions import db
+from models import Post
+from services import images
+from services.cache import local_cache
+
+def test_missing_manifest_is_cached(app, monkeypatch):
+    local_cache.clear()
+    opened = []
+    real_open = builtins.open
+
+    def counting_open(path, *args, **kwargs):
+        if str(path).endswith('.json'):
+            opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', counting_open)
+    with app.test_request_context():
+        for _ in range(5):
+            assert images.image_manifest('uploads/nao-existe.jpg') is None
+            assert 'src="/static/uploads/nao-existe.jpg"' in images.responsive_img('uploads/nao-existe.jpg')
+    assert len(opened) == 1
+
+def test_placeholder_is_deterministic_and_inline(app):
+    first = images.placeholder_data_uri('42', 300, 250)
+    assert first == images.placeholder_data_uri('42', 300, 250)
+    assert first != images.placeholder_data_uri('43', 300, 250)
+    assert first.startswith('data:image/svg+xml,') and '"' not in first and '#' not in first
+
+def _save_png(folder, name, size=(1600, 1200)):
+    from PIL import Image
+    path = os.path.join(folder, name)
+    Image.new('RGB', size, (200, 40, 90)).save(path)
+    return path
+
+def test_post_save_does_not_decode_the_image(app, uploads, make_post, monkeypatch):
+    from PIL import Image
+    path = _save_png(uploads, 'grande.png')
+    relative_path = os.path.relpath(path, app.static_folder)
+    local_cache.clear()
+
+    opened = []
+    real_open = Image.open
+
+    def counting_open(*args, **kwargs):
+        opened.append(args[0])
+        return real_open(*args, **kwargs)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Image, 'open', counting_open)
+        post = make_post(titulo='Com imagem', imagem=relative_path)
+    assert opened == [] and post.imagem_lqip is None
+
+    # O pipeline grava a prévia no manifesto e no post
+    with app.app_context():
+        manifest = images.image_pipeline.process(path, relative_path)
+        assert manifest['lqip'].startswith('data:image/webp;base64,')
+        assert db.session.get(Post, post.id).imagem_lqip == manifest['lqip']
+        assert db.session.get(Post, post.id).data_atualizacao == post.data_atualizacao
+
+    # Imagem já processada: o save lê a prévia do manifesto
+    other = make_post(titulo='Mesma imagem', imagem=relative_path)
+    assert other.imagem_lqip == manifest['lqip']
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+import pytest
+from extensions import db, mail
+from models import OutboxMessage
+from services.outbox import outbox
+
+class FakeSMTP:
+    """Conexão SMTP falsa: registra as mensagens e falha para os destinatários indicados."""
+
+    def __init__(self, fail_for=(), fail_connect=False):
+        self.sent = []
+        self.connections = 0
+        self.fail_for = set(fail_for)
+        self.fail_connect = fail_connect
+
+    def __call__(self):
+        if self.fail_connect:
+            raise ConnectionRefusedError('SMTP indisponível')
+        self.connections += 1
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send(self, message):
+        if self.fail_for & set(message.recipients):
+            raise RuntimeError('destinatário recusado')
+        self.sent.append(message)
+
+@pytest.fixture
+def smtp(monkeypatch):
+    fake = FakeSMTP()
+    monkeypatch.setattr(mail, 'connect', fake)
+    return fake
+
+def _messages():
+    return {m.recipients: m for m in OutboxMessage.query.all()}
+
+def test_batch_uses_one_connection(app, smtp):
+    with app.app_context():
+        for i in range(3):
+            outbox.enqueue('Contato', [f'pessoa{i}@example.com'], 'Olá')
+        assert outbox.process_batch() == 3
+        assert smtp.connections == 1 and len(smtp.sent) == 3
+        assert {m.status for m in _messages().values()} == {'enviado'}
+        assert outbox.process_batch() == 0
+
+def test_failed_message_is_retried_with_exponential_backoff(app, smtp, monkeypatch):
+    monkeypatch.setattr(outbox, 'retry_base', 60)
+    monkeypatch.setattr(outbox, 'max_attempts', 3)
+    smtp.fail_for = {'ruim@example.com'}
+    with app.app_context():
+        outbox.enqueue('Contato', ['ruim@example.com'], 'Olá')
+        outbox.enqueue('Contato', ['bom@example.com'], 'Olá')
+        before = datetime.utcnow()
+        assert outbox.process_batch() == 1
+
+        failed = _messages()['ruim@example.com']
+        assert (failed.status, failed.attempts) == ('pendente', 1)
+        assert 'recusado' in failed.last_error
+        assert timedelta(seconds=59) < failed.next_attempt_at - before < timedelta(seconds=62)
+        # Ainda não venceu: não é reservada de novo
+        assert outbox.process_batch() == 0
+
+        delays = []
+        for _ in range(2):
+            failed.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+            db.session.commit()
+            start = datetime.utcnow()
+            outbox.process_batch()
+            failed = _messages()['ruim@example.com']
+            delays.append(failed.next_attempt_at - start)
+        assert timedelta(seconds=119) < delays[0] < timedelta(seconds=122)
+        assert (failed.status, failed.attempts) == ('falhou', 3)
+
+def test_connection_failure_returns_batch_to_queue(app, monkeypatch):
+    monkeypatch.setattr(mail, 'connect', FakeSMTP(fail_connect=True))
+    with app.app_context():
+        outbox.enqueue('Contato', ['a@example.com'], 'Olá')
+        assert outbox.process_batch() == 0
+        message = _messages()['a@example.com']
+        assert (message.status, message.attempts) == ('pendente', 1)
+        assert 'indisponível' in message.last_error
+
+def test_claim_skips_in_flight_and_recovers_stale(app, smtp):
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add_all([
+            OutboxMessage(subject='s', recipients='ocupada@example.com', body='b', status='enviando',
+                          next_attempt_at=now),
+            OutboxMessage(subject='s', recipients='abandonada@example.com', body='b', status='enviando',
+                          next_attempt_at=now - timedelta(seconds=outbox.claim_timeout + 1)),
+        ])
+        db.session.commit()
+        assert outbox.process_batch() == 1
+        assert [m.recipients for m in smtp.sent] == [['abandonada@example.com']]
+        assert _messages()['ocupada@example.com'].status == 'enviando'
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from routes.blog import encode_cursor, decode_cursor, paginate_posts
+
+def _seed(make_post):
+    base = datetime(2026, 1, 1)
+    # Datas repetidas: o id desempata a ordem
+    dates = [base, base, base + timedelta(days=1), base + timedelta(days=2), base + timedelta(days=2),
+             base + timedelta(days=3), base + timedelta(days=4)]
+    posts = [make_post(titulo=f'Post {i}', data_criacao=d) for i, d in enumerate(dates)]
+    make_post(titulo='Rascunho', publicado=False, data_criacao=base + timedelta(days=5))
+    return [p.id for p in sorted(posts, key=lambda p: (p.data_criacao, p.id), reverse=True)]
+
+def test_cursor_round_trip():
+    class Row:
+        data_criacao = datetime(2026, 3, 4, 5, 6, 7, 891011)
+        id = 42
+    assert decode_cursor(encode_cursor(Row)) == (Row.data_criacao, 42)
+    assert decode_cursor('lixo') is None and decode_cursor('') is None and decode_cursor('2026-13-01_1') is None
+
+def test_keyset_pages_forward_and_back(app, make_post):
+    expected = _seed(make_post)
+    with app.app_context():
+        pages, cursor = [], None
+        while True:
+            posts, prev_cursor, next_cursor = paginate_posts(3, after=decode_cursor(cursor))
+            pages.append(([p.id for p in posts], prev_cursor))
+            if not next_cursor:
+                break
+            cursor = next_cursor
+        assert [i for ids, _ in pages for i in ids] == expected
+        assert pages[0][1] is None
+
+        # Voltando pelo cursor "anterior" de cada página chega-se às mesmas páginas
+        for (ids, prev_cursor), (previous_ids, _) in zip(pages[1:], pages):
+            posts, _, _ = paginate_posts(3, before=decode_cursor(prev_cursor))
+            assert [p.id for p in posts] == previous_ids
+
+def test_blog_accepts_cursor_urls(app, client, make_post):
+    _seed(make_post)
+    assert client.get('/blog/?apos=2026-01-03T00:00:00_5').status_code == 200
+    assert client.get('/blog/?apos=invalido').status_code == 200
@@ -0,0 +1,42 @@
+from extensions import db
+from models import Post, RelatedPost
+from services import related
+from services.text import normalize
+
+def _related(post_id):
+    return [slug for slug, _ in related.related_posts_for(post_id)]
+
+def test_normalize_strips_accents():
+    assert normalize('Ação Saúde ÍNDICE') == 'acao saude indice'
+
+def test_rebuild_and_incremental_update(app, make_post):
+    a = make_post(titulo='Python para análise de dados', conteudo='<p>pandas numpy dataframe python análise</p>')
+    b = make_post(titulo='Análise de dados com Python', conteudo='<p>python pandas dataframe gráficos</p>')
+    c = make_post(titulo='Receita de bolo de cenoura', conteudo='<p>farinha ovos cenoura forno açúcar</p>')
+    with app.app_context():
+        total, changed = related.rebuild_all(5)
+        assert total == 3 and changed
+        assert _related(a.id)[0] == b.slug
+        # Nada mudou: a atualização incremental não invalida os caches
+        assert related.update_posts([a.id], 5) is False
+
+        post = db.session.get(Post, c.id)
+        post.conteudo = '<p>python pandas dataframe análise de dados</p>'
+        db.session.commit()
+        assert related.update_posts([c.id], 5) is True
+        assert c.slug in _related(a.id)
+
+def test_update_skips_posts_deleted_meanwhile(app, make_post):
+    a = make_post(titulo='Docker em produção', conteudo='<p>docker containers deploy kubernetes</p>')
+    b = make_post(titulo='Kubernetes e Docker', conteudo='<p>kubernetes docker cluster deploy</p>')
+    with app.app_context():
+        corpus = related.Corpus()
+        ids = corpus.refresh()
+        neighbours = related.top_k(corpus.matrix(ids), list(range(len(ids))), 5)
+        # b é excluído enquanto os vizinhos eram calculados
+        db.session.delete(db.session.get(Post, b.id))
+        db.session.commit()
+        related._save(neighbours, ids, ids)
+        rows = db.session.query(RelatedPost.post_id, RelatedPost.related_id).all()
+        assert rows == []
+        assert related.update_posts([b.id], 5) is False
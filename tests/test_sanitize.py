@@ -0,0 +1,60 @@
+import pytest
+from services.text import sanitize_html
+
+@pytest.mark.parametrize('html', [
+    '<script>alert(1)</script>',
+    '<img src=x onerror=alert(1)>',
+    '<a href="javascript:alert(1)">x</a>',
+    '<a href=" JaVaScRiPt:alert(1)">x</a>',
+    '<a href="java&#x09;script:alert(1)">x</a>',
+    '<a href="data:text/html;base64,PHNjcmlwdD4=">x</a>',
+    '<svg onload=alert(1)>',
+    '<iframe src="https://evil.example.com/"></iframe>',
+    '<iframe src="javascript:alert(1)"></iframe>',
+    '<p style="background:url(javascript:alert(1))">x</p>',
+    '<style>body{}</style><p>x</p>',
+    '<div onclick="alert(1)">x</div>',
+    '<object data="x.swf"></object><embed src="x.swf">',
+    '<form action="https://evil.example.com"><input name="x"></form>',
+])
+def test_dangerous_markup_is_removed(html):
+    clean = sanitize_html(html).lower()
+    for needle in ('<script', 'onerror', 'onload', 'onclick', 'javascript:', 'data:', 'evil.example.com',
+                   'style=', '<style', '<object', '<embed', '<form', '<input', '<svg'):
+        assert needle not in clean
+
+def test_text_is_escaped():
+    assert sanitize_html('<p>1 &lt; 2 &amp; &lt;script&gt;</p>') == '<p>1 &lt; 2 &amp; &lt;script&gt;</p>'
+
+def test_allowed_markup_is_kept():
+    html = ('<h2>Título</h2><p><a href="https://example.com" target="_blank">link</a> '
+            '<img src="/static/uploads/a.jpg" alt="a"></p>'
+            '<iframe src="https://www.youtube.com/embed/abc" allowfullscreen></iframe>')
+    clean = sanitize_html(html)
+    assert '<a href="https://example.com" target="_blank" rel="noopener noreferrer">link</a>' in clean
+    assert '<img src="/static/uploads/a.jpg" alt="a">' in clean
+    assert '<iframe src="https://www.youtube.com/embed/abc"' in clean
+
+def test_unbalanced_tags_are_closed():
+    assert sanitize_html('<p><strong>texto') == '<p><strong>texto</strong></p>'
+
+@pytest.mark.parametrize('conteudo', [
+    '<script>alert(1)</script>',
+    '<iframe src="https://evil.example.com/"></iframe>',
+])
+def test_post_with_empty_sanitized_body_does_not_serve_raw_content(client, make_post, conteudo):
+    post = make_post(titulo='Vazio', conteudo=conteudo)
+    assert post.conteudo_renderizado == ''
+    html = client.get('/blog/vazio').get_data(as_text=True)
+    assert 'alert(1)' not in html and 'evil.example.com' not in html
+
+def test_post_without_rendered_body_is_sanitized_on_the_fly(app, client, make_post):
+    from extensions import db
+    from models import Post
+    post = make_post(titulo='Antigo', conteudo='<p>ok</p><script>alert(1)</script>')
+    with app.app_context():
+        # Post anterior ao backfill: campo derivado ainda vazio
+        db.session.execute(db.update(Post).where(Post.id == post.id).values(conteudo_renderizado=None))
+        db.session.commit()
+    html = client.get('/blog/antigo').get_data(as_text=True)
+    assert '<p>ok</p>' in html and 'alert(1)' not in html
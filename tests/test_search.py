@@ -0,0 +1,59 @@
+from extensions import db
+from services import search
+
+def test_fts_search_with_highlight(app, make_post):
+    make_post(titulo='Introdução ao Flask', conteudo='<p>Rotas, <b>blueprints</b> e templates</p>')
+    make_post(titulo='Receitas', conteudo='<p>Nada de programação aqui</p>')
+    make_post(titulo='Rascunho sobre Flask', publicado=False)
+    with app.app_context():
+        results, total = search.search_posts('blueprint')
+        assert total == 1
+        assert results[0]['slug'] == 'introducao-ao-flask'
+        assert '<mark>blueprints</mark>' in results[0]['trecho']
+        # Prefixo e acentos
+        assert search.search_posts('introduc')[1] == 1
+
+def test_search_falls_back_to_like_without_index(app, make_post, monkeypatch):
+    make_post(titulo='Guia de SQLAlchemy', resumo='ORM para Python')
+    with app.app_context():
+        monkeypatch.setattr(search, 'AVAILABILITY_RECHECK', 0)
+        with db.engine.begin() as conn:
+            conn.execute(db.text('DROP TABLE posts_fts'))
+        search._available.clear()
+        try:
+            results, total = search.search_posts('SQLAlchemy')
+            assert total == 1 and results[0]['slug'] == 'guia-de-sqlalchemy'
+            assert search.index_available(db.engine) is False
+        finally:
+            # O índice criado com o app rodando passa a ser usado sem reiniciar
+            with db.engine.begin() as conn:
+                for statement in search.SQLITE_SCHEMA:
+                    conn.execute(db.text(statement))
+        assert search.index_available(db.engine) is True
+
+def _drop_index(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(db.text('DROP TABLE posts_fts'))
+        search._available.clear()
+
+def _indexed_ids(app):
+    with app.app_context():
+        return {row[0] for row in db.session.execute(db.text('SELECT rowid FROM posts_fts'))}
+
+def test_init_db_creates_search_index_and_indexes_sample_post(app):
+    _drop_index(app)
+    result = app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    assert 'Índice de busca criado.' in result.output
+    with app.app_context():
+        results, total = search.search_posts('profissional')
+        assert total == 1 and results[0]['slug'] == 'bem-vindo-ao-mente-magna'
+        assert '<mark>' in results[0]['trecho']
+    assert len(_indexed_ids(app)) == 1
+
+def test_init_db_indexes_existing_posts(app, make_post):
+    post = make_post(titulo='Post anterior ao índice')
+    _drop_index(app)
+    assert app.test_cli_runner().invoke(args=['init-db']).exit_code == 0
+    assert _indexed_ids(app) == {post.id}
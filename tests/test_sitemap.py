@@ -0,0 +1,48 @@
+import gzip
+import re
+
+LOC_RE = re.compile(r'<loc>([^<]+)</loc>')
+
+def test_sitemap_single_urlset(client, make_post):
+    make_post(titulo='Primeiro artigo')
+    response = client.get('/sitemap.xml')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert '<urlset' in body
+    assert 'http://localhost/blog/primeiro-artigo' in body
+
+def test_sitemap_index_with_shards(app, client, make_post, monkeypatch):
+    for i in range(6):
+        make_post(titulo=f'Artigo {i}')
+    monkeypatch.setitem(app.config, 'SITEMAP_MAX_URLS', 4)
+
+    response = client.get('/sitemap.xml')
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert '<sitemapindex' in body
+    shards = LOC_RE.findall(body)
+    assert len(shards) >= 2
+    assert body.count('<lastmod>') == len(shards)
+
+    urls = []
+    for loc in shards:
+        assert loc.endswith('.xml.gz')
+        shard = client.get(loc.replace('http://localhost', ''))
+        assert shard.status_code == 200
+        xml = gzip.decompress(shard.data).decode('utf-8')
+        entries = LOC_RE.findall(xml)
+        assert 0 < len(entries) <= 4
+        urls.extend(entries)
+    assert len(urls) == len(set(urls))
+    assert all(f'http://localhost/blog/artigo-{i}' in urls for i in range(6))
+
+def test_sitemap_index_plain_shards(app, client, make_post, monkeypatch):
+    for i in range(6):
+        make_post(titulo=f'Artigo {i}')
+    monkeypatch.setitem(app.config, 'SITEMAP_MAX_URLS', 4)
+    monkeypatch.setitem(app.config, 'SITEMAP_GZIP', False)
+
+    body = client.get('/sitemap.xml').get_data(as_text=True)
+    shards = LOC_RE.findall(body)
+    assert shards[0] == 'http://localhost/sitemap-1.xml'
+    assert client.get(f'/sitemap-{len(shards) + 1}.xml').status_code == 404
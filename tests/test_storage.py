@@ -0,0 +1,54 @@
+import io
+import os
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from services.storage import store_upload
+
+GPS_IFD = 0x8825
+ORIENTATION = 0x0112
+
+def _photo(fmt, **save_kwargs):
+    image = Image.new('RGB', (64, 48))
+    for x in range(64):
+        image.putpixel((x, x % 48), (x * 4, 255 - x * 4, 90))
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[0x010F] = 'Fabricante'
+    exif.get_ifd(GPS_IFD).update({1: 'S', 2: (23.0, 33.0, 1.0)})
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, exif=exif, **save_kwargs)
+    return buffer.getvalue()
+
+def _store(app, data, filename):
+    with app.test_request_context():
+        relative_path, created = store_upload(FileStorage(io.BytesIO(data), filename=filename))
+    return os.path.join(app.static_folder, relative_path), created
+
+@pytest.mark.parametrize('fmt, filename', [('JPEG', 'foto.jpg'), ('PNG', 'foto.png'), ('WEBP', 'foto.webp')])
+def test_upload_metadata_is_removed_losslessly(app, uploads, fmt, filename):
+    data = _photo(fmt, **({'lossless': True} if fmt == 'WEBP' else {}))
+    with Image.open(io.BytesIO(data)) as original:
+        assert original.getexif().get_ifd(GPS_IFD)
+        pixels = original.tobytes()
+
+    path, created = _store(app, data, filename)
+    assert created
+    with open(path, 'rb') as f:
+        stored = f.read()
+    assert b'Fabricante' not in stored
+    with Image.open(path) as image:
+        exif = image.getexif()
+        assert not exif.get_ifd(GPS_IFD)
+        # Orientação mantida só no JPEG (os navegadores a aplicam)
+        assert exif.get(ORIENTATION) == (6 if fmt == 'JPEG' else None)
+        assert image.tobytes() == pixels
+
+    # O mesmo arquivo enviado de novo é reaproveitado
+    assert _store(app, data, filename) == (path, False)
+
+def test_other_files_are_stored_as_is(app, uploads):
+    data = b'GIF89a' + b'\x00' * 32
+    path, _ = _store(app, data, 'anim.gif')
+    with open(path, 'rb') as f:
+        assert f.read() == data
@@ -0,0 +1,27 @@
+from extensions import db
+from models import Post, commit_unique_slug
+from services.view_counter import view_counter
+
+def test_views_survive_a_slug_change(app, client, make_post):
+    post = make_post(titulo='Titulo original')
+    view_counter.flush()
+    assert client.get('/blog/titulo-original').status_code == 200
+    assert client.get('/blog/titulo-original').status_code == 200
+
+    with app.app_context():
+        edited = db.session.get(Post, post.id)
+        edited.titulo = 'Titulo novo'
+        commit_unique_slug(edited)
+        assert edited.slug == 'titulo-novo'
+
+    assert view_counter.flush() == 1
+    with app.app_context():
+        assert db.session.get(Post, post.id).views == (post.views or 0) + 2
+
+def test_cached_page_hit_counts_by_id(app, make_post):
+    from routes.blog import count_cached_view
+    post = make_post(titulo='Em cache')
+    view_counter.flush()
+    count_cached_view({'slug': 'slug-antigo', 'post_id': post.id})
+    assert view_counter._pending[post.id] == 1
+    view_counter.flush()
@@ -0,0 +1,27 @@
+"""
+Ponto de entrada WSGI: cria uma única aplicação por processo.
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+O ambiente vem de FLASK_ENV (o gunicorn.conf.py e o passenger_wsgi.py usam
+'production'). Com o preload do gunicorn, este módulo é importado só no
+processo mestre, antes do fork dos workers.
+"""
+import time
+_started = time.perf_counter()
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from run import create_app
+from services import startup
+
+_imported = time.perf_counter()
+application = create_app()
+_created = time.perf_counter()
+startup.record(application, _started, _imported, _created, startup.precompile_templates(application))
+
+# 'flask' sem FLASK_APP procura 'app' em wsgi.py
+app = application